@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+
+
+class NullBackend:
+    """Accepts every action and does nothing (replay, headless runs, dry runs)."""
+
+    def moveTo(self, x, y, **kwargs):
+        pass
+
+    def click(self, **kwargs):
+        pass
+
+    def rightClick(self, **kwargs):
+        pass
+
+    def press(self, key, **kwargs):
+        pass
+
+    def scroll(self, clicks, **kwargs):
+        pass
+
+    def hotkey(self, *keys, **kwargs):
+        pass
+
+
+class ActionDispatcher:
+    """Runs OS input injection on its own thread so the frame loop never waits on it.
+
+    Actions execute in submission order. Cursor moves are coalesced: a move
+    submitted while the previous move is still queued replaces its target, so
+    a slow backend catches up by jumping to the newest position instead of
+    replaying a backlog. A click submitted after a move still happens after
+    that move, at the position it was aimed at.
+
+    `backend` is anything with the pyautogui function names (pyautogui itself
+    by default, imported lazily). Every call passes `_pause=False`. The worker
+    thread starts with the first action.
+
+    Errors of the backend are counted and the worker carries on, except for
+    pyautogui's FailSafeException (pointer in a screen corner): that is the
+    user's emergency stop, so dispatching stops and the exception is raised
+    again by the next action call or check() in the frame loop.
+    """
+
+    def __init__(self, backend=None, stats_window=256):
+        if backend is None:
+            import pyautogui
+            backend = pyautogui
+        self.backend = backend
+        self._cond = threading.Condition()
+        self._queue = deque()  # [name, args, enqueue time]
+        self._busy = False
+        self._running = False
+        self._thread = None
+
+        self.executed = 0
+        self.coalesced = 0  # Moves replaced by a newer target before they ran
+        self.errors = 0
+        self.last_error = None
+        self.failsafe = None  # FailSafeException that stopped the worker
+        # Recent latencies in seconds: time spent queued, time spent in the backend
+        self.queue_latency = deque(maxlen=stats_window)
+        self.exec_latency = deque(maxlen=stats_window)
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="ActionDispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def check(self):
+        """Re-raise the FailSafeException that stopped dispatching, if any."""
+        if self.failsafe is not None:
+            raise self.failsafe
+
+    def _submit(self, name, *args):
+        self.check()
+        with self._cond:
+            if not self._running:
+                self.start()
+            self._queue.append([name, args, time.perf_counter()])
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    return
+                name, args, queued_at = self._queue.popleft()
+                self._busy = True
+            start = time.perf_counter()
+            try:
+                getattr(self.backend, name)(*args, _pause=False)
+            except Exception as e:
+                failsafe = getattr(self.backend, "FailSafeException", None)
+                if failsafe is not None and isinstance(e, failsafe):
+                    with self._cond:
+                        self.failsafe = e
+                        self._queue.clear()
+                        self._busy = False
+                        self._running = False
+                        self._cond.notify_all()
+                    return
+                self.errors += 1
+                self.last_error = e
+            end = time.perf_counter()
+            with self._cond:
+                self._busy = False
+                self.executed += 1
+                self.queue_latency.append(start - queued_at)
+                self.exec_latency.append(end - start)
+                self._cond.notify_all()
+
+    # ---- Actions: same names and arguments as pyautogui ----
+
+    def moveTo(self, x, y):
+        self.check()
+        with self._cond:
+            if self._queue and self._queue[-1][0] == "moveTo":
+                # Keep the original queue time so the reported latency stays honest
+                self._queue[-1][1] = (x, y)
+                self.coalesced += 1
+                return
+        self._submit("moveTo", x, y)
+
+    def click(self):
+        self._submit("click")
+
+    def rightClick(self):
+        self._submit("rightClick")
+
+    def press(self, key):
+        self._submit("press", key)
+
+    def scroll(self, clicks):
+        self._submit("scroll", clicks)
+
+    def hotkey(self, *keys):
+        self._submit("hotkey", *keys)
+
+    # ---- Inspection / shutdown ----
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted action ran. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def stats(self):
+        """Counters plus mean / max queueing and execution latency in milliseconds."""
+        with self._cond:
+            queued, execd = list(self.queue_latency), list(self.exec_latency)
+        out = {"executed": self.executed, "coalesced": self.coalesced, "errors": self.errors, "pending": self.pending()}
+        for key, values in (("queue", queued), ("exec", execd)):
+            out[f"{key}_ms_mean"] = 1000 * sum(values) / len(values) if values else 0.0
+            out[f"{key}_ms_max"] = 1000 * max(values) if values else 0.0
+        return out
+
+    def close(self, timeout=1.0):
+        """Let already queued actions run (up to `timeout` seconds) and stop the worker."""
+        if self._thread is None:
+            return
+        self.wait_idle(timeout)
+        with self._cond:
+            self._queue.clear()
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+
+
+class Compositor:
+    """Semi-transparent overlay that only costs as much as the area drawn on it.
+
+    Instead of copying the whole frame into an overlay and blending the whole
+    frame back, the frame is split into tiles. Drawing through the wrapper
+    methods marks the touched tiles, copies just those from the frame into a
+    reusable overlay buffer, and blend() runs addWeighted over the marked
+    tiles only. Pixels outside them are left untouched, which is what a
+    full-frame blend of an unchanged copy produces anyway.
+
+        comp.begin(img)
+        comp.rectangle((20, 20), (350, 250), color, -1)
+        comp.blend(0.8)
+    """
+
+    def __init__(self, tile=32):
+        self.tile = tile
+        self.img = None
+        self.buffer = None
+        self.dirty = None
+
+    def begin(self, img):
+        h, w = img.shape[:2]
+        if self.buffer is None or self.buffer.shape != img.shape:
+            self.buffer = np.empty_like(img)
+            self.dirty = np.zeros((-(-h // self.tile), -(-w // self.tile)), dtype=bool)
+        else:
+            self.dirty[:] = False
+        self.img = img
+        return self
+
+    @staticmethod
+    def _runs(row):
+        # (start, stop) pairs of consecutive True values in a 1-D bool array
+        padded = np.zeros(len(row) + 2, dtype=bool)
+        padded[1:-1] = row
+        return np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2).tolist()
+
+    def mark(self, x1, y1, x2, y2):
+        """Declare that pixels inside [x1, x2) x [y1, y2) are about to be drawn on."""
+        h, w = self.img.shape[:2]
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(w, int(x2)), min(h, int(y2))
+        if x1 >= x2 or y1 >= y2:
+            return
+        t = self.tile
+        r1, r2 = y1 // t, (y2 - 1) // t + 1
+        c1, c2 = x1 // t, (x2 - 1) // t + 1
+        tiles = self.dirty[r1:r2, c1:c2]
+        if not tiles.any():
+            # Common case: fresh area, bring it in with a single copy
+            ys, xs = slice(r1 * t, r2 * t), slice(c1 * t, c2 * t)
+            self.buffer[ys, xs] = self.img[ys, xs]
+        elif not tiles.all():
+            # Bring in the frame pixels of newly touched tiles before drawing over them
+            for r in range(r1, r2):
+                for s, e in self._runs(~self.dirty[r, c1:c2]):
+                    ys, xs = slice(r * t, (r + 1) * t), slice((c1 + s) * t, (c1 + e) * t)
+                    self.buffer[ys, xs] = self.img[ys, xs]
+        tiles[:] = True
+
+    def blend(self, alpha):
+        """Blend the overlay into the frame in place: img = alpha * overlay + (1 - alpha) * img."""
+        t = self.tile
+        rows = np.flatnonzero(self.dirty.any(axis=1)).tolist()
+        i = 0
+        while i < len(rows):
+            # Consecutive tile rows with the same dirty pattern are blended together
+            j = i + 1
+            while j < len(rows) and rows[j] == rows[j - 1] + 1 and (self.dirty[rows[j]] == self.dirty[rows[i]]).all():
+                j += 1
+            for s, e in self._runs(self.dirty[rows[i]]):
+                ys, xs = slice(rows[i] * t, (rows[j - 1] + 1) * t), slice(s * t, e * t)
+                roi = self.img[ys, xs]
+                cv2.addWeighted(self.buffer[ys, xs], alpha, roi, 1 - alpha, 0, roi)
+            i = j
+        self.dirty[:] = False
+        return self.img
+
+    # ---- Drawing wrappers: same arguments as the cv2 functions minus the image ----
+
+    def rectangle(self, pt1, pt2, color, thickness=1):
+        pad = max(thickness, 1)
+        self.mark(min(pt1[0], pt2[0]) - pad, min(pt1[1], pt2[1]) - pad,
+                  max(pt1[0], pt2[0]) + pad + 1, max(pt1[1], pt2[1]) + pad + 1)
+        cv2.rectangle(self.buffer, pt1, pt2, color, thickness)
+
+    def line(self, pt1, pt2, color, thickness=1):
+        pad = thickness + 1
+        self.mark(min(pt1[0], pt2[0]) - pad, min(pt1[1], pt2[1]) - pad,
+                  max(pt1[0], pt2[0]) + pad + 1, max(pt1[1], pt2[1]) + pad + 1)
+        cv2.line(self.buffer, pt1, pt2, color, thickness)
+
+    def arrowed_line(self, pt1, pt2, color, thickness=1, tip_length=0.1):
+        pad = thickness + 1 + int(np.hypot(pt2[0] - pt1[0], pt2[1] - pt1[1]) * tip_length)
+        self.mark(min(pt1[0], pt2[0]) - pad, min(pt1[1], pt2[1]) - pad,
+                  max(pt1[0], pt2[0]) + pad + 1, max(pt1[1], pt2[1]) + pad + 1)
+        cv2.arrowedLine(self.buffer, pt1, pt2, color, thickness, tipLength=tip_length)
+
+    def polylines(self, pts, is_closed, color, thickness=1):
+        pts = np.asarray(pts, dtype=np.int32)
+        if pts.size == 0:
+            return
+        flat = pts.reshape(-1, 2)
+        pad = thickness + 1
+        (x1, y1), (x2, y2) = flat.min(axis=0), flat.max(axis=0)
+        self.mark(x1 - pad, y1 - pad, x2 + pad + 1, y2 + pad + 1)
+        cv2.polylines(self.buffer, pts if pts.ndim == 3 else [pts], is_closed, color, thickness)
+
+    def circle(self, center, radius, color, thickness=1):
+        pad = radius + max(thickness, 1) + 1
+        self.mark(center[0] - pad, center[1] - pad, center[0] + pad + 1, center[1] + pad + 1)
+        cv2.circle(self.buffer, center, radius, color, thickness)
+
+    def marker(self, position, color, marker_type=cv2.MARKER_CROSS, size=20, thickness=1):
+        pad = size // 2 + thickness + 1
+        self.mark(position[0] - pad, position[1] - pad, position[0] + pad + 1, position[1] + pad + 1)
+        cv2.drawMarker(self.buffer, position, color, marker_type, size, thickness)
+
+    def text(self, text, org, font, scale, color, thickness=1):
+        (tw, th), baseline = cv2.getTextSize(text, font, scale, thickness)
+        pad = thickness + 1
+        self.mark(org[0] - pad, org[1] - th - pad, org[0] + tw + pad + 1, org[1] + baseline + pad + 1)
+        cv2.putText(self.buffer, text, org, font, scale, color, thickness)
+
+    def paste(self, x, y, patch, mask=None):
+        """Copy a pre-rendered patch (optionally through a uint8 mask) into the overlay."""
+        ph, pw = patch.shape[:2]
+        self.mark(x, y, x + pw, y + ph)
+        h, w = self.buffer.shape[:2]
+        x1, y1, x2, y2 = max(0, x), max(0, y), min(w, x + pw), min(h, y + ph)
+        if x1 >= x2 or y1 >= y2:
+            return
+        src = patch[y1 - y:y2 - y, x1 - x:x2 - x]
+        dst = self.buffer[y1:y2, x1:x2]
+        if mask is None:
+            dst[:] = src
+        else:
+            cv2.copyTo(src, mask[y1 - y:y2 - y, x1 - x:x2 - x], dst)
@@ -0,0 +1,124 @@
+import threading
+import time
+
+
+class CursorInterpolator:
+    """Emits cursor positions at display rate from targets that arrive at camera rate.
+
+    The gesture path calls update(x, y, timestamp) once per processed frame.
+    A timer thread wakes `rate_hz` times per second and sends output(x, y)
+    the position the pointer should have at `now - latency`, interpolated
+    between the two newest targets. That delay is the latency budget: with
+    about one frame interval (`latency=None` tracks it automatically) there
+    is nearly always a newer target to interpolate towards. With
+    `extrapolate=True` the motion is instead continued past the newest
+    target for up to `max_extrapolation` seconds, which allows a smaller
+    budget (even 0) at the cost of overshoot when the hand stops.
+
+    An exception from `output` (e.g. the dispatcher's failsafe stop) ends
+    the timer thread; it is kept in `error` for the owner to act on.
+    """
+
+    def __init__(self, output, rate_hz=120, latency=None, extrapolate=False, max_extrapolation=0.05,
+                 min_step=0.5, clock=time.perf_counter, start=True):
+        self.output = output
+        self.rate_hz = rate_hz
+        self.latency = latency
+        self.extrapolate = extrapolate
+        self.max_extrapolation = max_extrapolation
+        self.min_step = min_step  # Pixels; smaller changes are not sent
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._prev = None    # (t, x, y)
+        self._latest = None  # (t, x, y)
+        self._sent = None
+        self.sample_interval = 1 / 30.0  # Running estimate of the time between targets
+        self.emitted = 0
+        self.error = None
+        self._running = False
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CursorInterpolator", daemon=True)
+        self._thread.start()
+        return self
+
+    def update(self, x, y, timestamp=None):
+        """New target position, stamped with the capture time of its frame."""
+        t = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            if self._latest is not None:
+                dt = t - self._latest[0]
+                if dt <= 0:
+                    self._latest = (self._latest[0], x, y)
+                    return
+                self.sample_interval += 0.1 * (dt - self.sample_interval)
+            self._prev, self._latest = self._latest, (t, x, y)
+
+    def reset(self):
+        """Forget the targets (hand lost, control paused); the next update is applied directly."""
+        with self._lock:
+            self._prev = self._latest = None
+
+    def position(self, now=None):
+        """Interpolated position for time `now` (defaults to the clock), or None without targets."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            prev, latest = self._prev, self._latest
+            latency = self.sample_interval if self.latency is None else self.latency
+        if latest is None:
+            return None
+        if prev is None:
+            return latest[1], latest[2]
+        t = now - latency
+        t0, x0, y0 = prev
+        t1, x1, y1 = latest
+        if t <= t0:
+            return x0, y0
+        if t > t1:
+            if not self.extrapolate:
+                return x1, y1
+            t = min(t, t1 + self.max_extrapolation)
+        a = (t - t0) / (t1 - t0)
+        return x0 + (x1 - x0) * a, y0 + (y1 - y0) * a
+
+    def _run(self):
+        period = 1.0 / self.rate_hz
+        deadline = self.clock()
+        while self._running:
+            pos = self.position()
+            if pos is not None and (self._sent is None or abs(pos[0] - self._sent[0]) >= self.min_step
+                                    or abs(pos[1] - self._sent[1]) >= self.min_step):
+                try:
+                    self.output(*pos)
+                except Exception as e:
+                    self.error = e
+                    self._running = False
+                    return
+                self._sent = pos
+                self.emitted += 1
+            # Sleep to an absolute deadline so the rate does not drift with the work done
+            deadline += period
+            delay = deadline - self.clock()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = self.clock()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,208 @@
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import cv2
+
+# What `cv2.waitKey(...) & 0xFF` gives when nothing was pressed
+NO_KEY = 0xFF
+
+
+class ControlChannel:
+    """Key presses that do not come from an OpenCV window.
+
+    Entry points read it through Display.poll_key(), so a key sent here acts
+    exactly like the same key pressed in the window ('q', 'm', 'k', '1'...).
+    Sources are stdin (every character of a line is one key, so `echo q`
+    quits) and POSIX signals mapped to keys.
+    """
+
+    def __init__(self):
+        self._keys = queue.SimpleQueue()
+        self._stdin_thread = None
+
+    def send(self, key):
+        self._keys.put(ord(key) if isinstance(key, str) else key & 0xFF)
+
+    def poll(self):
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            return NO_KEY
+
+    def listen_stdin(self, stream=None):
+        """Read keys from stdin on a daemon thread. EOF stops reading, it does not quit."""
+        if self._stdin_thread is None:
+            stream = stream or sys.stdin
+            self._stdin_thread = threading.Thread(target=self._read_lines, args=(stream,), name="ControlStdin", daemon=True)
+            self._stdin_thread.start()
+        return self
+
+    def _read_lines(self, stream):
+        for line in stream:
+            for ch in line.strip():
+                if not ch.isspace():
+                    self.send(ch)
+
+    def install_signals(self, mapping=None):
+        """Map signals to keys: SIGINT / SIGTERM -> 'q' plus `mapping` ({"SIGUSR1": "m"}).
+
+        Must be called from the main thread. Signals the platform does not have
+        are skipped. A second quit signal gets the previous handler, so Ctrl+C
+        twice still interrupts a loop that stopped polling.
+        """
+        keys = {"SIGINT": "q", "SIGTERM": "q"}
+        keys.update(mapping or {})
+        for name, key in keys.items():
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            previous = signal.getsignal(signum)
+
+            def handler(signum, frame, key=key, previous=previous):
+                self.send(key)
+                if key == "q":
+                    signal.signal(signum, previous)
+
+            signal.signal(signum, handler)
+        return self
+
+
+class FrameSink:
+    """Writes rendered frames on a background thread instead of showing them.
+
+    `path` is a video file (.mp4, .avi...) or an image sequence pattern with a
+    printf field ("out/frame_%06d.jpg"). At most `max_pending` frames wait for
+    the writer; beyond that new frames are dropped (counted in `dropped`) so a
+    slow disk never slows the frame loop. Frames must not be modified after
+    write().
+    """
+
+    def __init__(self, path, fps=30.0, fourcc="mp4v", max_pending=8):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.written = 0
+        self.dropped = 0
+        self._writer = None
+        self._frames = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._worker, name="FrameSink", daemon=True)
+        self._thread.start()
+
+    @property
+    def is_sequence(self):
+        return "%" in self.path
+
+    def write(self, img):
+        try:
+            self._frames.put_nowait(img)
+        except queue.Full:
+            self.dropped += 1
+
+    def _worker(self):
+        while True:
+            img = self._frames.get()
+            if img is None:
+                break
+            if self.is_sequence:
+                cv2.imwrite(self.path % self.written, img)
+            else:
+                if self._writer is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    h, w = img.shape[:2]
+                    self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+                self._writer.write(img)
+            self.written += 1
+        if self._writer is not None:
+            self._writer.release()
+
+    def close(self, timeout=5.0):
+        """Flush the pending frames and close the file."""
+        self._frames.put(None)
+        self._thread.join(timeout)
+
+
+class Display:
+    """Where the entry points send their frames and get their keys from.
+
+    With a window this is cv2.imshow / cv2.waitKey. Headless it makes no GUI
+    call at all: frames go to the optional `sink`, keys come only from the
+    `control` channel, and the achieved frame rate is printed every
+    `report_interval` seconds. `renders` tells the loop whether anybody looks
+    at the frames, so it can skip drawing the HUD.
+    """
+
+    def __init__(self, window, headless=False, sink=None, control=None, fullscreen=False, report_interval=5.0):
+        self.window = window
+        self.headless = headless
+        self.sink = sink
+        self.control = control or ControlChannel()
+        self.report_interval = report_interval
+        self._frames = 0
+        self._report_start = time.perf_counter()
+        if not headless:
+            cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+            if fullscreen:
+                cv2.setWindowProperty(window, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+
+    @property
+    def renders(self):
+        return not self.headless or self.sink is not None
+
+    def show(self, img):
+        if not self.headless:
+            cv2.imshow(self.window, img)
+        if self.sink is not None:
+            self.sink.write(img)
+        self._frames += 1
+        if self.headless and self.report_interval:
+            now = time.perf_counter()
+            if now - self._report_start >= self.report_interval:
+                print(f"[HEADLESS] {self._frames / (now - self._report_start):.1f} FPS")
+                self._frames, self._report_start = 0, now
+
+    def poll_key(self, delay=1):
+        """Next key from the window or the control channel, NO_KEY if there is none."""
+        key = self.control.poll()
+        if key != NO_KEY:
+            return key
+        if self.headless:
+            if delay > 1:
+                # Waiting loops (loading screens) should not spin
+                time.sleep(delay / 1000)
+            return NO_KEY
+        return cv2.waitKey(delay) & 0xFF
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+
+def add_arguments(parser):
+    """Adds --headless, --sink, --sink-fps and --no-stdin to an argparse parser."""
+    parser.add_argument("--headless", action="store_true",
+                        help="no window: keys from stdin and signals, frames only to --sink")
+    parser.add_argument("--sink", metavar="PATH",
+                        help="also write the rendered frames to a video file or an image pattern (frame_%%06d.jpg)")
+    parser.add_argument("--sink-fps", type=float, default=30.0, help="frame rate stored in the --sink video")
+    parser.add_argument("--no-stdin", action="store_true",
+                        help="do not read keys from stdin in headless mode (e.g. when run in the background)")
+    return parser
+
+
+def from_args(args, window, fullscreen=False, signals=None):
+    """Builds the Display for parsed `args`, with its control channel listening.
+
+    `signals` maps extra signal names to keys, e.g. {"SIGUSR1": "m"}.
+    """
+    control = ControlChannel().install_signals(signals)
+    if args.headless and not args.no_stdin:
+        control.listen_stdin()
+    sink = FrameSink(args.sink, args.sink_fps) if args.sink else None
+    return Display(window, args.headless, sink, control, fullscreen)
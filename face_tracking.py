@@ -1,6 +1,14 @@
+import threading
+import time
+from collections import namedtuple
 import cv2
 import mediapipe as mp
 import numpy as np
+from landmarks import Landmarks
+
+# What FaceTracker.process() saw in one frame: a tuple of face Landmarks
+# (read-only point arrays), the frame timestamp and its (width, height)
+FaceResult = namedtuple("FaceResult", ["faces", "timestamp", "size"])
 
 class FaceTracker:
     def __init__(self, static_image_mode=False, max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5):
@@ -14,10 +22,27 @@ class FaceTracker:
         )
         self.mp_draw = mp.solutions.drawing_utils
         self.draw_spec = self.mp_draw.DrawingSpec(thickness=1, circle_radius=1, color=(0, 255, 0))
+        self._lock = threading.Lock()
+
+    def process(self, img, timestamp=None):
+        """Face mesh of `img` as a FaceResult, nothing kept on the tracker. Thread-safe."""
+        ih, iw = img.shape[:2]
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        with self._lock:
+            results = self.face_mesh.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        faces = []
+        for face_lms in results.multi_face_landmarks or []:
+            face = Landmarks.from_mediapipe(face_lms, iw, ih, timestamp=timestamp)
+            face.points.setflags(write=False)
+            faces.append(face)
+        return FaceResult(tuple(faces), timestamp, (iw, ih))
 
-    def find_face_mesh(self, img, draw=True):
+    def find_face_mesh(self, img, draw=True, timestamp=None):
+        ih, iw = img.shape[:2]
+        timestamp = time.perf_counter() if timestamp is None else timestamp
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.face_mesh.process(img_rgb)
+        with self._lock:
+            self.results = self.face_mesh.process(img_rgb)
         
         faces = []
         if self.results.multi_face_landmarks:
@@ -32,11 +57,9 @@ class FaceTracker:
                         connection_drawing_spec=self.mp_draw.DrawingSpec(color=(255, 200, 0), thickness=1, circle_radius=1)
                     )
                 
-                face = []
-                for id, lm in enumerate(face_lms.landmark):
-                    ih, iw, ic = img.shape
-                    x, y = int(lm.x * iw), int(lm.y * ih)
-                    face.append([id, x, y, lm.z])
-                faces.append(face)
+                faces.append(Landmarks.from_mediapipe(face_lms, iw, ih, timestamp=timestamp))
                 
         return img, faces
+
+    def close(self):
+        self.face_mesh.close()
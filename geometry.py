@@ -0,0 +1,135 @@
+import numpy as np
+import cv2
+
+
+class WireframeMesh:
+    """Wireframe model: float (V, 3) vertices and int (E, 2) edge index pairs."""
+
+    def __init__(self, vertices, edges, name=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float64)
+        self.edges = np.ascontiguousarray(edges, dtype=np.int32).reshape(-1, 2)
+        self.name = name
+        if len(self.edges) and (self.edges.min() < 0 or self.edges.max() >= len(self.vertices)):
+            raise ValueError("Edge index out of range")
+
+    def __len__(self):
+        return len(self.edges)
+
+    def transformed(self, scale=1.0, offset=(0, 0, 0)):
+        return WireframeMesh(self.vertices * scale + np.asarray(offset, dtype=np.float64), self.edges, self.name)
+
+    @staticmethod
+    def merge(*meshes, name=None):
+        vertices, edges, base = [], [], 0
+        for mesh in meshes:
+            vertices.append(mesh.vertices)
+            edges.append(mesh.edges + base)
+            base += len(mesh.vertices)
+        return WireframeMesh(np.concatenate(vertices), np.concatenate(edges), name)
+
+
+def rotation_matrix(angle_x, angle_y):
+    # Rotation about X, then about Y (same order the HUD has always used)
+    cx, sx = np.cos(angle_x), np.sin(angle_x)
+    cy, sy = np.cos(angle_y), np.sin(angle_y)
+    rot_x = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    rot_y = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    return rot_y @ rot_x
+
+
+def project(vertices, angle_x, angle_y, center, scale, camera_distance=4.0):
+    """Rotate and perspective-project all vertices at once; returns int32 (V, 2) pixels."""
+    rotated = vertices @ rotation_matrix(angle_x, angle_y).T
+    z = 1 / (rotated[:, 2] + camera_distance)
+    xy = rotated[:, :2] * (z * scale)[:, None] + np.asarray(center, dtype=np.float64)
+    return xy.astype(np.int32)
+
+
+def draw_mesh(img, mesh, angle_x, angle_y, center, scale, color, thickness=1):
+    """Draw every edge of the mesh with one batched polylines call.
+
+    `img` is either an image or a Compositor, whose polylines wrapper also
+    records the touched area.
+    """
+    if not len(mesh):
+        return
+    segments = project(mesh.vertices, angle_x, angle_y, center, scale)[mesh.edges]
+    if isinstance(img, np.ndarray):
+        cv2.polylines(img, segments, False, color, thickness)
+    else:
+        img.polylines(segments, False, color, thickness)
+
+
+# ======================== MODELS ========================
+
+def cube(size=1.0):
+    v = np.array([[-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+                  [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1]], dtype=np.float64) * size
+    front = np.arange(4)
+    edges = np.concatenate([
+        np.stack([front, (front + 1) % 4], axis=1),          # front face
+        np.stack([front + 4, (front + 1) % 4 + 4], axis=1),  # back face
+        np.stack([front, front + 4], axis=1),                # connecting edges
+    ])
+    return WireframeMesh(v, edges, "cube")
+
+
+def ring(radius=1.0, segments=32, z=0.0):
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    v = np.stack([np.cos(angles) * radius, np.sin(angles) * radius, np.full(segments, z)], axis=1)
+    idx = np.arange(segments)
+    return WireframeMesh(v, np.stack([idx, (idx + 1) % segments], axis=1), "ring")
+
+
+def uv_sphere(radius=1.0, rings=8, segments=16):
+    # Latitude circles plus meridians, poles included
+    lat = np.linspace(0, np.pi, rings + 1)[1:-1]
+    lon = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    lat_g, lon_g = np.meshgrid(lat, lon, indexing="ij")
+    body = np.stack([np.sin(lat_g) * np.cos(lon_g), np.cos(lat_g), np.sin(lat_g) * np.sin(lon_g)], axis=-1)
+    v = np.concatenate([[[0, 1, 0]], body.reshape(-1, 3), [[0, -1, 0]]]) * radius
+
+    grid = np.arange(len(lat) * segments).reshape(len(lat), segments) + 1
+    around = np.stack([grid, np.roll(grid, -1, axis=1)], axis=-1).reshape(-1, 2)
+    down = np.stack([grid[:-1], grid[1:]], axis=-1).reshape(-1, 2)
+    top = np.stack([np.zeros(segments, dtype=int), grid[0]], axis=1)
+    bottom = np.stack([grid[-1], np.full(segments, len(v) - 1)], axis=1)
+    return WireframeMesh(v, np.concatenate([around, down, top, bottom]), "sphere")
+
+
+def arc_reactor(radius=1.0, segments=36):
+    # Three concentric rings joined by radial spokes
+    rings = [ring(radius * r, segments) for r in (1.0, 0.7, 0.35)]
+    mesh = WireframeMesh.merge(*rings)
+    # Twelve evenly spaced spokes (fewer when the rings have fewer vertices)
+    spokes = np.unique(np.linspace(0, segments, 12, endpoint=False).astype(int))
+    outer, inner = spokes, spokes + segments
+    edges = np.concatenate([mesh.edges, np.stack([outer, inner], axis=1)])
+    return WireframeMesh(mesh.vertices, edges, "arc_reactor")
+
+
+def load_obj(path, name=None):
+    """Load vertices and edges from a Wavefront .obj file (faces become their outline edges)."""
+    vertices, edges = [], set()
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                vertices.append([float(c) for c in parts[1:4]])
+            elif parts[0] in ("f", "l"):
+                idx = [int(p.split("/")[0]) for p in parts[1:]]
+                idx = [i - 1 if i > 0 else len(vertices) + i for i in idx]
+                pairs = zip(idx, idx[1:] + idx[:1]) if parts[0] == "f" else zip(idx, idx[1:])
+                edges.update(tuple(sorted(p)) for p in pairs if p[0] != p[1])
+    return WireframeMesh(np.array(vertices, dtype=np.float64).reshape(-1, 3),
+                         np.array(sorted(edges), dtype=np.int32).reshape(-1, 2), name or path)
+
+
+MODELS = {
+    "cube": cube,
+    "sphere": uv_sphere,
+    "ring": ring,
+    "arc_reactor": arc_reactor,
+}
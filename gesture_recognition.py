@@ -1,5 +1,21 @@
 import numpy as np
 
+FINGER_TIPS = [8, 12, 16, 20]
+FINGER_PIPS = [6, 10, 14, 18]
+# Landmark pairs measured every frame: thumb-index, index-middle, wrist-index MCP
+PAIR_A = [4, 8, 0]
+PAIR_B = [8, 12, 5]
+
+GESTURES = ["None", "Fist", "Pinch", "Two-Finger", "Open Palm", "Unknown"]
+SWIPES = [None, "Left", "Right", "Up", "Down"]
+
+def _measure(xy):
+    # Works on one frame (21, 2) or a batch (T, 21, 2); both paths share this math
+    diffs = xy[..., PAIR_A, :] - xy[..., PAIR_B, :]
+    dists = np.sqrt((diffs * diffs).sum(axis=-1))
+    extended = np.count_nonzero(xy[..., FINGER_TIPS, 1] < xy[..., FINGER_PIPS, 1], axis=-1)
+    return dists, extended
+
 class GestureRecognizer:
     def __init__(self):
         self.pinch_threshold = 30
@@ -8,6 +24,7 @@ class GestureRecognizer:
         self.prev_center_y = None
         self.swipe_threshold = 15 # Lowered for per-frame detection
         self.swipe_cooldown = 0
+        self.swipe_cooldown_frames = 15
         self.analytics = {
             "pinch_dist": 0,
             "index_middle_dist": 0,
@@ -21,7 +38,7 @@ class GestureRecognizer:
         self.kb_mode = False
         
     def get_gesture(self, landmarks):
-        if not landmarks:
+        if landmarks is None or len(landmarks) == 0:
             return "None"
             
         # Landmark IDs:
@@ -31,54 +48,31 @@ class GestureRecognizer:
         # 16: Ring Tip
         # 20: Pinky Tip
         # 0: Wrist
-        
-        # Calculate distance between thumb and index tips for pinch
-        thumb_tip = np.array([landmarks[4][1], landmarks[4][2]])
-        index_tip = np.array([landmarks[8][1], landmarks[8][2]])
-        pinch_dist = np.linalg.norm(thumb_tip - index_tip)
-        self.analytics["pinch_dist"] = int(pinch_dist)
+        xy = np.asarray(landmarks, dtype=np.float32)[:, :2]
 
-        # Distance between index and middle (for potential slider control)
-        middle_tip = np.array([landmarks[12][1], landmarks[12][2]])
-        im_dist = np.linalg.norm(index_tip - middle_tip)
+        # Thumb-index (pinch), index-middle (right click) and wrist-index MCP
+        # (palm size, used as a scale estimate) distances in one pass
+        dists, extended = _measure(xy)
+        pinch_dist, im_dist, hand_scale = dists.tolist()
+        self.analytics["pinch_dist"] = int(pinch_dist)
         self.analytics["index_middle_dist"] = int(im_dist)
-
-        # Scale estimate based on palm size (Distance between wrist and index MCP)
-        wrist = np.array([landmarks[0][1], landmarks[0][2]])
-        index_mcp = np.array([landmarks[5][1], landmarks[5][2]])
-        self.analytics["hand_scale"] = np.linalg.norm(wrist - index_mcp)
+        self.analytics["hand_scale"] = hand_scale
         
         # Screen Position Mapping (using index finger Tip 8)
-        ix, iy = landmarks[8][1], landmarks[8][2]
+        ix, iy = xy[8].tolist()
         # Smooth movement
         self.smoothened_x = self.smoothened_x + (ix - self.smoothened_x) / self.smooth_factor
         self.smoothened_y = self.smoothened_y + (iy - self.smoothened_y) / self.smooth_factor
         self.analytics["screen_pos"] = (int(self.smoothened_x), int(self.smoothened_y))
         
-        # Check if fingers are extended (Open Palm vs Fist)
-        fingers = []
-        # Thumb: check if thumb tip is to the right/left of thumb IP joint depending on hand
-        # For simplicity, we can use distance from wrist or relative position
-        # A more robust way is checking the angle or Y coordinate for non-thumb fingers
-        
-        # Index, Middle, Ring, Pinky
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        
-        extended_count = 0
-        for tip, pip in zip(tips, pips):
-            if landmarks[tip][2] < landmarks[pip][2]: # Tip is above PIP joint
-                extended_count += 1
+        # Index, Middle, Ring, Pinky: extended when the tip is above the PIP joint
+        extended_count = int(extended)
                 
         # Dynamic click threshold based on hand scale (distance from wrist to index MCP)
         # Larger hand scale = closer to camera = larger threshold
-        dynamic_threshold = self.base_click_threshold * (self.analytics["hand_scale"] / 80.0)
+        dynamic_threshold = self.base_click_threshold * (hand_scale / 80.0)
         dynamic_threshold = max(20, min(50, dynamic_threshold))
 
-        # Right Click Detection (Index + Middle tips close)
-        middle_tip = np.array([landmarks[12][1], landmarks[12][2]])
-        im_dist = np.linalg.norm(index_tip - middle_tip)
-        
         # Gesture Logic
         if extended_count == 0:
             return "Fist"
@@ -92,11 +86,11 @@ class GestureRecognizer:
         return "Unknown"
 
     def detect_swipe(self, landmarks):
-        if not landmarks:
+        if landmarks is None or len(landmarks) == 0:
             return None
             
-        center_x = landmarks[9][1] # Middle finger MCP joint as center
-        center_y = landmarks[9][2]
+        # Middle finger MCP joint as center
+        center_x, center_y = np.asarray(landmarks, dtype=np.float32)[9, :2].tolist()
         swipe = None
         
         if self.prev_center_x is not None and self.prev_center_y is not None:
@@ -108,12 +102,12 @@ class GestureRecognizer:
                 if abs(diff_x) > self.swipe_threshold and abs(diff_x) > abs(diff_y):
                     if diff_x > 0: swipe = "Right"
                     else: swipe = "Left"
-                    self.swipe_cooldown = 15
+                    self.swipe_cooldown = self.swipe_cooldown_frames
                 # Detect vertical swipe
                 elif abs(diff_y) > self.swipe_threshold and abs(diff_y) > abs(diff_x):
                     if diff_y > 0: swipe = "Down"
                     else: swipe = "Up"
-                    self.swipe_cooldown = 15
+                    self.swipe_cooldown = self.swipe_cooldown_frames
                 
         self.prev_center_x = center_x
         self.prev_center_y = center_y
@@ -121,3 +115,81 @@ class GestureRecognizer:
             self.swipe_cooldown -= 1
             
         return swipe
+
+    def classify_sequence(self, points, timestamps=None):
+        """Vectorized equivalent of calling get_gesture + detect_swipe on every frame.
+
+        points is a (T, 21, >=2) array of landmark pixels; frames without a hand
+        are rows containing NaN. Starts from a fresh state (like a new
+        recognizer with this one's thresholds) and leaves self untouched, so
+        thresholds can be swept over recorded sessions. Returns a dict of
+        per-frame arrays plus the list of swipe events (frame, timestamp, direction).
+        """
+        xy_all = np.asarray(points, dtype=np.float32)[..., :2]
+        T = len(xy_all)
+        if timestamps is None:
+            timestamps = np.arange(T, dtype=np.float64)
+        valid = ~np.isnan(xy_all).any(axis=(1, 2))
+        idx = np.flatnonzero(valid)
+        xy = xy_all[idx]
+
+        dists, extended = _measure(xy)
+        pinch, im, scale = (dists[:, i].astype(np.float64) for i in range(3))
+
+        # Same decision order as get_gesture
+        threshold = np.clip(self.base_click_threshold * (scale / 80.0), 20, 50)
+        codes = np.select(
+            [extended == 0, pinch < threshold, (im < self.right_click_threshold) & (extended >= 2), extended >= 4],
+            [GESTURES.index("Fist"), GESTURES.index("Pinch"), GESTURES.index("Two-Finger"), GESTURES.index("Open Palm")],
+            GESTURES.index("Unknown"))
+
+        # Cursor smoothing is a recurrence; a scalar loop keeps it bit-identical
+        screen = np.zeros((len(idx), 2), dtype=np.int32)
+        sx, sy = 0, 0
+        for i, (ix, iy) in enumerate(xy[:, 8].tolist()):
+            sx = sx + (ix - sx) / self.smooth_factor
+            sy = sy + (iy - sy) / self.smooth_factor
+            screen[i] = (int(sx), int(sy))
+
+        # Swipes: vectorized candidate test, then the cooldown applied greedily
+        swipe_codes = np.zeros(len(idx), dtype=np.uint8)
+        events = []
+        if len(idx) > 1:
+            centers = xy[:, 9].astype(np.float64)
+            dx, dy = (centers[1:] - centers[:-1]).T
+            horizontal = (np.abs(dx) > self.swipe_threshold) & (np.abs(dx) > np.abs(dy))
+            vertical = ~horizontal & (np.abs(dy) > self.swipe_threshold) & (np.abs(dy) > np.abs(dx))
+            direction = np.where(horizontal, np.where(dx > 0, 2, 1), np.where(dy > 0, 4, 3))
+            next_allowed = 0
+            for k in (np.flatnonzero(horizontal | vertical) + 1).tolist():
+                if k >= next_allowed:
+                    swipe_codes[k] = direction[k - 1]
+                    next_allowed = k + self.swipe_cooldown_frames
+                    events.append((int(idx[k]), float(timestamps[idx[k]]), SWIPES[swipe_codes[k]]))
+
+        gesture_codes = np.zeros(T, dtype=np.uint8)
+        gesture_codes[idx] = codes
+        all_swipes = np.zeros(T, dtype=np.uint8)
+        all_swipes[idx] = swipe_codes
+        pinch_dist = np.zeros(T, dtype=np.int32)
+        pinch_dist[idx] = pinch.astype(np.int32)
+        im_dist = np.zeros(T, dtype=np.int32)
+        im_dist[idx] = im.astype(np.int32)
+        hand_scale = np.full(T, np.nan)
+        hand_scale[idx] = scale
+        screen_pos = np.zeros((T, 2), dtype=np.int32)
+        screen_pos[idx] = screen
+
+        return {
+            "timestamps": np.asarray(timestamps, dtype=np.float64),
+            "valid": valid,
+            "gesture_codes": gesture_codes,
+            "gesture": np.array(GESTURES, dtype=object)[gesture_codes],
+            "swipe_codes": all_swipes,
+            "swipe": np.array(SWIPES, dtype=object)[all_swipes],
+            "swipe_events": events,
+            "pinch_dist": pinch_dist,
+            "index_middle_dist": im_dist,
+            "hand_scale": hand_scale,
+            "screen_pos": screen_pos,
+        }
@@ -1,9 +1,50 @@
+import threading
+import time
+from collections import namedtuple
 import cv2
 import mediapipe as mp
 import numpy as np
+from landmarks import Landmarks
+from smoothing import LandmarkSmoother
+
+
+class HandResult(namedtuple("HandResult", ["hands", "timestamp", "size"])):
+    """What HandTracker.process() saw in one frame.
+
+    `hands` is a tuple of Landmarks in MediaPipe order (their point arrays
+    are read-only), `timestamp` the frame time and `size` its (width, height).
+    """
+
+    __slots__ = ()
+
+    def hand(self, idx=0):
+        return self.hands[idx] if idx < len(self.hands) else None
+
+
+class TrackState:
+    """Tracking state of one video stream: ROI for the next frame and landmark filters.
+
+    A HandTracker keeps its own in `state`; pass a separate one per stream to
+    process() when a tracker alternates between streams.
+    """
+
+    __slots__ = ("roi", "frames_since_full", "roi_hands", "smoother", "wrists", "next_key", "keyed_results", "keys")
+
+    def __init__(self, smoother=None):
+        self.roi = None  # (x0, y0, x1, y1) in pixels, used for the next frame
+        self.frames_since_full = 0
+        self.roi_hands = 0
+        self.smoother = smoother
+        self.wrists = {}  # filter key -> (x, y, timestamp) of the wrist when last seen
+        self.next_key = 0
+        self.keyed_results = None  # MediaPipe result `keys` was assigned for
+        self.keys = []
+
 
 class HandTracker:
-    def __init__(self, static_image_mode=False, max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.5):
+    def __init__(self, static_image_mode=False, max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 roi_mode=False, roi_padding=0.35, inference_size=None, roi_refresh=30,
+                 smoothing="moving_average", smoothing_params=None):
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=static_image_mode,
@@ -11,13 +52,50 @@ class HandTracker:
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
+        self.max_num_hands = max_num_hands
         self.mp_draw = mp.solutions.drawing_utils
-        self.landmark_history = []
-        self.smoothing_window = 5
 
-    def find_hands(self, img, draw=True):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(img_rgb)
+        # Per-hand smoothing: "moving_average" (5 frames), "ema", "one_euro" or None
+        if smoothing == "moving_average" and not smoothing_params:
+            smoothing_params = {"window": 5}
+        self.smoothing = smoothing
+        self.smoothing_params = smoothing_params or {}
+
+        # ROI mode: run inference on a padded crop around the last known hands
+        self.roi_mode = roi_mode
+        self.roi_padding = roi_padding  # Fraction of the hand box added on each side
+        self.inference_size = inference_size  # Longest side fed to MediaPipe (None = as captured)
+        self.roi_refresh = roi_refresh  # Full-frame pass every N frames while hands may be missing
+        self.state = self.new_state()
+        # The MediaPipe graph (and a stream's state) serve one frame at a time
+        self._lock = threading.Lock()
+
+    def new_state(self):
+        return TrackState(LandmarkSmoother(self.smoothing, **self.smoothing_params) if self.smoothing else None)
+
+    def process(self, img, timestamp=None, state=None):
+        """Track the hands in `img` and return a HandResult. Safe to call from several threads.
+
+        Nothing about the frame is kept on the tracker. `state` (a TrackState)
+        carries ROI and smoothing between frames of one stream and defaults
+        to the tracker's own.
+        """
+        h, w = img.shape[:2]
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        state = self.state if state is None else state
+        with self._lock:
+            results = self._detect(img, state)
+            hands = []
+            for idx in range(len(results.multi_hand_landmarks or [])):
+                landmarks = self._landmarks(results, idx, w, h, timestamp, state)
+                landmarks.points.setflags(write=False)
+                hands.append(landmarks)
+        return HandResult(tuple(hands), timestamp, (w, h))
+
+    def find_hands(self, img, draw=True, timestamp=None):
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+        with self._lock:
+            self.results = self._detect(img, self.state)
         
         if self.results.multi_hand_landmarks:
             for hand_lms in self.results.multi_hand_landmarks:
@@ -25,41 +103,130 @@ class HandTracker:
                     self.mp_draw.draw_landmarks(img, hand_lms, self.mp_hands.HAND_CONNECTIONS)
         return img
 
+    def _detect(self, img, state):
+        h, w = img.shape[:2]
+        results = None
+        all_tracked = self.roi_mode and state.roi_hands >= self.max_num_hands
+        if self.roi_mode and state.roi is not None and (all_tracked or state.frames_since_full < self.roi_refresh):
+            results = self._process_region(img, state.roi)
+            state.frames_since_full += 1
+            if not results.multi_hand_landmarks:
+                results = None  # Lost the hand inside the ROI
+        if results is None:
+            results = self._process_region(img, (0, 0, w, h))
+            state.frames_since_full = 0
+        if self.roi_mode:
+            state.roi = self._next_roi(results, state.roi, w, h)
+            state.roi_hands = len(results.multi_hand_landmarks or [])
+        return results
+
+    def _process_region(self, img, box):
+        x0, y0, x1, y1 = box
+        h, w = img.shape[:2]
+        patch = img[y0:y1, x0:x1]
+        ph, pw = patch.shape[:2]
+        if self.inference_size and max(pw, ph) > self.inference_size:
+            scale = self.inference_size / max(pw, ph)
+            patch = cv2.resize(patch, (max(1, int(pw * scale)), max(1, int(ph * scale))), interpolation=cv2.INTER_AREA)
+        results = self.hands.process(cv2.cvtColor(patch, cv2.COLOR_BGR2RGB))
+
+        # Landmarks are normalized to the patch; map them back to the full frame
+        if results.multi_hand_landmarks and (pw, ph) != (w, h):
+            for hand_lms in results.multi_hand_landmarks:
+                for lm in hand_lms.landmark:
+                    lm.x = (x0 + lm.x * pw) / w
+                    lm.y = (y0 + lm.y * ph) / h
+                    lm.z = lm.z * pw / w
+        return results
+
+    def _next_roi(self, results, roi, w, h):
+        if not results.multi_hand_landmarks:
+            return None
+        xs = [lm.x for hand_lms in results.multi_hand_landmarks for lm in hand_lms.landmark]
+        ys = [lm.y for hand_lms in results.multi_hand_landmarks for lm in hand_lms.landmark]
+        bx0, bx1 = min(xs) * w, max(xs) * w
+        by0, by1 = min(ys) * h, max(ys) * h
+        side = max(bx1 - bx0, by1 - by0)
+
+        # Keep the current ROI while the hand sits well inside it, so MediaPipe's
+        # own frame-to-frame tracking sees a stable coordinate frame
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            margin = side * self.roi_padding / 2
+            if (bx0 - margin >= x0 and bx1 + margin <= x1 and by0 - margin >= y0 and by1 + margin <= y1
+                    and side >= 0.35 * (x1 - x0)):
+                return roi
+
+        # Square, padded box around the hands, clamped to the frame
+        side = max(64, side * (1 + 2 * self.roi_padding))
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+        x0 = int(max(0, min(cx - side / 2, w - side)))
+        y0 = int(max(0, min(cy - side / 2, h - side)))
+        x1 = int(min(w, x0 + side))
+        y1 = int(min(h, y0 + side))
+        return (x0, y0, x1, y1)
+
     def get_landmarks(self, img, hand_idx=0):
-        landmarks = []
-        h, w, c = img.shape
-        if self.results.multi_hand_landmarks:
-            if len(self.results.multi_hand_landmarks) > hand_idx:
-                my_hand = self.results.multi_hand_landmarks[hand_idx]
-                for id, lm in enumerate(my_hand.landmark):
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    landmarks.append([id, cx, cy, lm.z])
-                
-                # Apply basic smoothing
-                landmarks = self._smooth_landmarks(landmarks)
-                
-        return landmarks
-
-    def _smooth_landmarks(self, landmarks):
-        if not landmarks:
-            return []
-            
-        self.landmark_history.append(landmarks)
-        if len(self.landmark_history) > self.smoothing_window:
-            self.landmark_history.pop(0)
-            
-        avg_landmarks = []
-        for i in range(len(landmarks)):
-            sum_x = sum(h[i][1] for h in self.landmark_history)
-            sum_y = sum(h[i][2] for h in self.landmark_history)
-            avg_x = int(sum_x / len(self.landmark_history))
-            avg_y = int(sum_y / len(self.landmark_history))
-            avg_landmarks.append([landmarks[i][0], avg_x, avg_y, landmarks[i][3]])
-            
-        return avg_landmarks
+        h, w = img.shape[:2]
+        if not self.results.multi_hand_landmarks or len(self.results.multi_hand_landmarks) <= hand_idx:
+            return None
+        with self._lock:
+            return self._landmarks(self.results, hand_idx, w, h, self.timestamp, self.state)
+
+    def _landmarks(self, results, hand_idx, w, h, timestamp, state):
+        handedness, confidence = None, 1.0
+        if results.multi_handedness and len(results.multi_handedness) > hand_idx:
+            classification = results.multi_handedness[hand_idx].classification[0]
+            handedness, confidence = classification.label, classification.score
+        landmarks = Landmarks.from_mediapipe(results.multi_hand_landmarks[hand_idx], w, h,
+                                             handedness, confidence, timestamp)
+
+        if state.smoother is None:
+            return landmarks
+        return self._smooth_landmarks(landmarks, state.smoother, self._hand_key(results, hand_idx, w, h, timestamp, state))
+
+    def _hand_key(self, results, hand_idx, w, h, timestamp, state):
+        # MediaPipe's handedness label flips on a single hand now and then, so it
+        # cannot name a filter. With one hand there is one filter; with several,
+        # each hand takes the filter whose wrist was nearest in the last frames
+        if self.max_num_hands == 1:
+            return "hand"
+        if state.keyed_results is not results:
+            state.keyed_results = results
+            state.keys = self._match_hands(results, w, h, timestamp, state)
+        return state.keys[hand_idx]
+
+    def _match_hands(self, results, w, h, timestamp, state):
+        max_age = state.smoother.max_age
+        for key in [k for k, (_, _, t) in state.wrists.items() if timestamp - t > max_age]:
+            del state.wrists[key]
+        wrists = [(hand_lms.landmark[0].x * w, hand_lms.landmark[0].y * h) for hand_lms in results.multi_hand_landmarks]
+        # Greedy assignment, closest pairs first
+        pairs = sorted(((x - px) ** 2 + (y - py) ** 2, i, key)
+                       for i, (x, y) in enumerate(wrists) for key, (px, py, _) in state.wrists.items())
+        keys = [None] * len(wrists)
+        taken = set()
+        for _, i, key in pairs:
+            if keys[i] is None and key not in taken:
+                keys[i] = key
+                taken.add(key)
+        for i, (x, y) in enumerate(wrists):
+            if keys[i] is None:
+                keys[i] = state.next_key
+                state.next_key += 1
+            state.wrists[keys[i]] = (x, y, timestamp)
+        return keys
+
+    def _smooth_landmarks(self, landmarks, smoother, key):
+        points = landmarks.points.copy()
+        points[:, :2] = smoother.smooth(key, landmarks.xy, landmarks.timestamp)
+        return landmarks.with_points(points)
 
     def get_hand_type(self, hand_idx=0):
         if self.results.multi_handedness:
             if len(self.results.multi_handedness) > hand_idx:
                 return self.results.multi_handedness[hand_idx].classification[0].label
         return None
+
+    def close(self):
+        self.hands.close()
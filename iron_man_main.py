@@ -1,24 +1,35 @@
+import argparse
 import cv2
 from hand_tracking import HandTracker
 from gesture_recognition import GestureRecognizer
 from hud_renderer import HUDRenderer
+from video_capture import open_capture, parse_source
+from telemetry import Telemetry
+import display as display_output
 
-def main():
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Iron Man AR HUD")
+    display_output.add_arguments(parser)
+    parser.add_argument("--source", type=parse_source, default=0, help="camera index, video file or stream URL")
+    args = parser.parse_args(argv)
+    
+    # Initialize camera (threaded, always serves the newest frame); video files play every frame
+    cap = open_capture(args.source, width=1280, height=720, realtime=True)
     
     # Initialize modules
     tracker = HandTracker(max_num_hands=1, min_detection_confidence=0.8)
     recognizer = GestureRecognizer()
     renderer = HUDRenderer()
+    telemetry = Telemetry(enabled=False)
+    display = display_output.from_args(args, "Iron Man AR HUD")
     
     print("Iron Man AR System Initializing...")
-    print("Press 'q' to exit.")
+    print("Press 'q' to exit, 't' to toggle performance telemetry.")
 
     while True:
-        success, img = cap.read()
+        telemetry.begin_frame()
+        with telemetry.stage("capture"):
+            success, img = cap.read()
         if not success:
             break
             
@@ -26,27 +37,37 @@ def main():
         img = cv2.flip(img, 1)
         
         # 1. Track Hands
-        img = tracker.find_hands(img, draw=False) # We'll do custom drawing
-        landmarks = tracker.get_landmarks(img)
+        with telemetry.stage("hand"):
+            landmarks = tracker.process(img).hand() # We'll do custom drawing
         
         # 2. Recognize Gestures
         gesture = "None"
         swipe = None
         if landmarks:
-            gesture = recognizer.get_gesture(landmarks)
-            swipe = recognizer.detect_swipe(landmarks)
+            with telemetry.stage("gesture"):
+                gesture = recognizer.get_gesture(landmarks)
+                swipe = recognizer.detect_swipe(landmarks)
             
         # 3. Render AR HUD
-        img = renderer.draw_hud(img, landmarks, gesture, swipe)
+        if display.renders:
+            with telemetry.stage("hud"):
+                img = renderer.draw_hud(img, landmarks, None, gesture, swipe)
+            telemetry.draw(img)
         
         # Display
-        cv2.imshow("Iron Man AR HUD", img)
+        with telemetry.stage("display"):
+            display.show(img)
+            key = display.poll_key()
+        telemetry.end_frame()
         
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        if key == ord('q'):
             break
+        elif key == ord('t'):
+            telemetry.enabled = not telemetry.enabled
+            telemetry.reset()
             
     cap.release()
-    cv2.destroyAllWindows()
+    display.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,108 @@
+import numpy as np
+from collections import namedtuple
+
+# label is what is drawn, output is what gets typed (a pyautogui key name)
+Key = namedtuple("Key", ["label", "output", "x", "y", "w", "h"])
+
+LAYOUTS = {
+    "qwerty": ["QWERTYUIOP", "ASDFGHJKL", "ZXCVBNM"],
+    "numbers": ["1234567890", "-+*/=.,", "()%:;"],
+    "symbols": ["!@#$%^&*()", "[]{}<>\\|", "'\"`~?_"],
+}
+
+# The original HUD keyboard was laid out for a 1280x720 frame
+REFERENCE_SIZE = (1280, 720)
+
+
+class KeyboardLayout:
+    """Key rectangles for the virtual keyboard, shared by the HUD and hit testing.
+
+    Each row is shifted right by `row_offset` like a physical keyboard. A
+    lookup table over the keyboard's bounding box maps every pixel to the
+    index of the key it falls in (-1 for gaps), so key_at() is one array
+    read no matter how many keys there are. As before, the key border
+    itself does not count as inside the key.
+    """
+
+    def __init__(self, rows, origin=(400, 450), key_size=50, gap=10, row_offset=20, name=None):
+        self.name = name
+        self.origin = (int(origin[0]), int(origin[1]))
+        self.key_size = int(key_size)
+        self.gap = int(gap)
+        self.row_offset = int(row_offset)
+        self.rows = list(rows)
+
+        self.keys = []
+        pitch = self.key_size + self.gap
+        for r_idx, row in enumerate(self.rows):
+            for c_idx, char in enumerate(row):
+                x = self.origin[0] + c_idx * pitch + r_idx * self.row_offset
+                y = self.origin[1] + r_idx * pitch
+                output = char.lower() if char.isalpha() else char
+                self.keys.append(Key(char, output, x, y, self.key_size, self.key_size))
+
+        if self.keys:
+            self.x1 = min(k.x for k in self.keys)
+            self.y1 = min(k.y for k in self.keys)
+            self.x2 = max(k.x + k.w for k in self.keys)
+            self.y2 = max(k.y + k.h for k in self.keys)
+        else:
+            self.x1 = self.y1 = self.x2 = self.y2 = 0
+        self.grid = np.full((self.y2 - self.y1, self.x2 - self.x1), -1, dtype=np.int16)
+        for i, k in enumerate(self.keys):
+            self.grid[k.y - self.y1 + 1:k.y + k.h - self.y1, k.x - self.x1 + 1:k.x + k.w - self.x1] = i
+
+    @classmethod
+    def preset(cls, name="qwerty", frame_size=None, key_size=50):
+        """Build a named layout, scaled from the 1280x720 reference to `frame_size` (w, h)."""
+        if name not in LAYOUTS:
+            raise ValueError(f"Unknown keyboard layout {name!r}, expected one of {sorted(LAYOUTS)}")
+        s = 1.0
+        if frame_size is not None:
+            s = min(frame_size[0] / REFERENCE_SIZE[0], frame_size[1] / REFERENCE_SIZE[1])
+        scale = s * key_size / 50
+        rows = LAYOUTS[name]
+        size, gap, row_offset = round(key_size * s), round(10 * scale), round(20 * scale)
+
+        # Keep the keyboard centered where the 50 px reference layout sits, so
+        # larger keys grow around it, then clamp it inside the frame
+        ref_w, ref_h = cls.extent(rows, 50, 10, 20)
+        cx, cy = (400 + ref_w / 2) * s, (450 + ref_h / 2) * s
+        w, h = cls.extent(rows, size, gap, row_offset)
+        x, y = round(cx - w / 2), round(cy - h / 2)
+        if frame_size is not None:
+            x = max(0, min(x, frame_size[0] - w))
+            y = max(0, min(y, frame_size[1] - h))
+        return cls(rows, origin=(x, y), key_size=size, gap=gap, row_offset=row_offset, name=name)
+
+    @staticmethod
+    def extent(rows, key_size, gap, row_offset):
+        """(width, height) of the keys of `rows` laid out with these dimensions."""
+        pitch = key_size + gap
+        width = max(r_idx * row_offset + len(row) * pitch - gap for r_idx, row in enumerate(rows))
+        return width, len(rows) * pitch - gap
+
+    @property
+    def cache_key(self):
+        return (self.name, tuple(self.rows), self.origin, self.key_size, self.gap, self.row_offset)
+
+    def key_at(self, x, y):
+        """Key under pixel (x, y), or None."""
+        x, y = int(x) - self.x1, int(y) - self.y1
+        if 0 <= y < self.grid.shape[0] and 0 <= x < self.grid.shape[1]:
+            i = self.grid[y, x]
+            if i >= 0:
+                return self.keys[i]
+        return None
+
+    def find(self, label):
+        for k in self.keys:
+            if k.label == label:
+                return k
+        return None
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
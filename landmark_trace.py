@@ -0,0 +1,289 @@
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+import numpy as np
+from landmarks import Landmarks
+from gesture_recognition import GESTURES, SWIPES
+
+# File layout:
+#   MAGIC, u32 metadata length, metadata JSON, then any number of chunks.
+#   Chunk: u32 header length, header JSON, padding to ALIGN, column blobs (each ALIGN-aligned).
+# Landmark columns are quantized to int16 and delta-encoded along time (with wrap-around,
+# so the cumulative sum restores them exactly). Raw columns are plain views of the mmap.
+MAGIC = b"HCITRACE1\n"
+ALIGN = 64
+XY_SCALE = 8.0      # 1/8 pixel resolution, up to +-4095 px
+Z_SCALE = 16384.0   # MediaPipe relative depth is well within +-2
+HANDEDNESS = [None, "Left", "Right"]
+
+TraceFrame = namedtuple("TraceFrame", ["index", "timestamp", "hand", "faces", "gesture", "swipe"])
+
+
+def _quantize(points):
+    q = np.empty(points.shape, dtype=np.float32)
+    q[..., :2] = points[..., :2] * XY_SCALE
+    q[..., 2] = points[..., 2] * Z_SCALE
+    return np.clip(np.rint(q), -32768, 32767).astype(np.int16)
+
+
+def _dequantize(q):
+    points = q.astype(np.float32)
+    points[..., :2] /= XY_SCALE
+    points[..., 2] /= Z_SCALE
+    return points
+
+
+def _delta_encode(q):
+    if len(q) == 0:
+        return q
+    out = np.empty_like(q)
+    out[0] = q[0]
+    np.subtract(q[1:], q[:-1], out=out[1:])  # int16 wrap-around is intended
+    return out
+
+
+def _delta_decode(d):
+    return np.cumsum(d, axis=0, dtype=d.dtype)
+
+
+class TraceRecorder:
+    """Appends timestamped tracker and gesture output to a chunked columnar trace file.
+
+    Frames are buffered in memory and written every `chunk_size` frames, so a
+    long session costs one small write per chunk. Opening an existing trace
+    appends to it.
+    """
+
+    def __init__(self, path, width, height, chunk_size=300, record_faces=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.record_faces = record_faces
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            TraceReader(path).close()  # Validates the header before appending
+        self.file = open(path, "ab")
+        if not exists:
+            meta = json.dumps({"version": 1, "width": width, "height": height}).encode()
+            self.file.write(MAGIC + struct.pack("<I", len(meta)) + meta)
+        self._reset()
+
+    def _reset(self):
+        self.timestamps = []
+        self.hand_valid = []
+        self.hands = []
+        self.handedness = []
+        self.confidence = []
+        self.face_valid = []
+        self.faces = []
+        self.gestures = []
+        self.swipes = []
+
+    def record(self, timestamp, hand=None, faces=None, gesture=None, swipe=None):
+        self.timestamps.append(timestamp)
+        self.hand_valid.append(bool(hand))
+        if hand:
+            self.hands.append(np.asarray(hand, dtype=np.float32)[:, :3])
+            self.handedness.append(HANDEDNESS.index(hand.handedness) if hand.handedness in HANDEDNESS else 0)
+            self.confidence.append(hand.confidence)
+        if self.record_faces:
+            self.face_valid.append(bool(faces))
+            if faces:
+                self.faces.append(np.asarray(faces[0], dtype=np.float32))
+        self.gestures.append(GESTURES.index(gesture) if gesture in GESTURES else 0)
+        self.swipes.append(SWIPES.index(swipe) if swipe in SWIPES else 0)
+        if len(self.timestamps) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.timestamps:
+            return
+        ts_us = np.rint(np.asarray(self.timestamps, dtype=np.float64) * 1e6).astype(np.int64)
+        columns = {
+            "timestamp": np.diff(ts_us, prepend=ts_us[0]).astype(np.int32),
+            "hand_valid": np.asarray(self.hand_valid, dtype=np.uint8),
+            "hand": _delta_encode(_quantize(np.asarray(self.hands, dtype=np.float32).reshape(-1, 21, 3))),
+            "handedness": np.asarray(self.handedness, dtype=np.uint8),
+            "confidence": np.asarray(self.confidence, dtype=np.float16),
+            "gesture": np.asarray(self.gestures, dtype=np.uint8),
+            "swipe": np.asarray(self.swipes, dtype=np.uint8),
+        }
+        header = {"frames": len(self.timestamps), "timestamp_base": int(ts_us[0]), "columns": {}}
+        if self.record_faces:
+            # 468 points, 478 with refine_landmarks (iris)
+            face_points = self.faces[0].shape[0] if self.faces else 468
+            header["face_points"] = face_points
+            columns["face_valid"] = np.asarray(self.face_valid, dtype=np.uint8)
+            columns["face"] = _delta_encode(_quantize(np.asarray(self.faces, dtype=np.float32).reshape(-1, face_points, 3)))
+
+        offset = 0
+        for name, arr in columns.items():
+            header["columns"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+        header = json.dumps(header).encode()
+
+        start = self.file.tell() + 4 + len(header)
+        parts = [struct.pack("<I", len(header)), header, b"\0" * (-start % ALIGN)]
+        for arr in columns.values():
+            data = np.ascontiguousarray(arr).tobytes()
+            parts.append(data + b"\0" * (-len(data) % ALIGN))
+        self.file.write(b"".join(parts))
+        self.file.flush()
+        self._reset()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """Memory-maps a trace file; columns are decoded lazily, chunk by chunk."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mm = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self.mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a landmark trace file")
+        pos = len(MAGIC)
+        (meta_len,) = struct.unpack("<I", bytes(self.mm[pos:pos + 4]))
+        self.meta = json.loads(bytes(self.mm[pos + 4:pos + 4 + meta_len]))
+        pos += 4 + meta_len
+
+        self.chunks = []
+        while pos + 4 <= len(self.mm):
+            (header_len,) = struct.unpack("<I", bytes(self.mm[pos:pos + 4]))
+            header = json.loads(bytes(self.mm[pos + 4:pos + 4 + header_len]))
+            data_start = pos + 4 + header_len
+            data_start += -data_start % ALIGN
+            header["data_start"] = data_start
+            size = max((c["offset"] + -(-int(np.prod(c["shape"])) * np.dtype(c["dtype"]).itemsize // ALIGN) * ALIGN
+                        for c in header["columns"].values()), default=0)
+            self.chunks.append(header)
+            pos = data_start + size
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+
+    def __len__(self):
+        return sum(chunk["frames"] for chunk in self.chunks)
+
+    def _raw(self, chunk, name):
+        col = chunk["columns"].get(name)
+        if col is None:
+            return None
+        dtype = np.dtype(col["dtype"])
+        count = int(np.prod(col["shape"]))
+        return np.frombuffer(self.mm, dtype=dtype, count=count,
+                             offset=chunk["data_start"] + col["offset"]).reshape(col["shape"])
+
+    def _decode_chunk(self, chunk):
+        ts = (chunk["timestamp_base"] + np.cumsum(self._raw(chunk, "timestamp"), dtype=np.int64)) / 1e6
+        hand = self._raw(chunk, "hand")
+        face = self._raw(chunk, "face")
+        if face is not None and "face_points" in chunk:
+            face = face.reshape(-1, chunk["face_points"], 3)
+        return {
+            "timestamp": ts,
+            "hand_valid": self._raw(chunk, "hand_valid").astype(bool),
+            "hand": _dequantize(_delta_decode(hand)) if hand is not None else None,
+            "handedness": self._raw(chunk, "handedness"),
+            "confidence": self._raw(chunk, "confidence"),
+            "face_valid": self._raw(chunk, "face_valid"),
+            "face": _dequantize(_delta_decode(face)) if face is not None and len(face) else None,
+            "gesture": self._raw(chunk, "gesture"),
+            "swipe": self._raw(chunk, "swipe"),
+        }
+
+    def hand_points(self):
+        """All frames as (T, 21, 3) float32 with NaN rows where no hand was seen,
+        ready for GestureRecognizer.classify_sequence."""
+        out = np.full((len(self), 21, 3), np.nan, dtype=np.float32)
+        timestamps = np.empty(len(self))
+        start = 0
+        for chunk in self.chunks:
+            cols = self._decode_chunk(chunk)
+            n = chunk["frames"]
+            if cols["hand"] is not None:
+                out[start:start + n][cols["hand_valid"]] = cols["hand"]
+            timestamps[start:start + n] = cols["timestamp"]
+            start += n
+        return out, timestamps
+
+    def frames(self):
+        index = 0
+        for chunk in self.chunks:
+            cols = self._decode_chunk(chunk)
+            hand_i = face_i = 0
+            for i in range(chunk["frames"]):
+                hand = None
+                if cols["hand_valid"][i]:
+                    hand = Landmarks(cols["hand"][hand_i], HANDEDNESS[cols["handedness"][hand_i]],
+                                     float(cols["confidence"][hand_i]), float(cols["timestamp"][i]))
+                    hand_i += 1
+                faces = []
+                if cols["face_valid"] is not None and cols["face_valid"][i]:
+                    faces = [Landmarks(cols["face"][face_i], timestamp=float(cols["timestamp"][i]))]
+                    face_i += 1
+                yield TraceFrame(index, float(cols["timestamp"][i]), hand, faces,
+                                 GESTURES[cols["gesture"][i]], SWIPES[cols["swipe"][i]])
+                index += 1
+
+    def close(self):
+        self.mm = None
+
+
+class ReplaySource:
+    """Feeds a recorded trace back through the pipeline without a camera or MediaPipe.
+
+    read() mimics cv2.VideoCapture and returns a blank frame (or a copy of
+    `background`) at the recorded resolution; the recorded landmarks of that
+    frame are available as `current`. With realtime=True frames are paced by
+    their recorded timestamps.
+    """
+
+    def __init__(self, path, background=None, realtime=False):
+        self.reader = TraceReader(path)
+        self.background = background
+        self.realtime = realtime
+        self._frames = self.reader.frames()
+        self.current = None
+        self._t0 = None
+
+    def read(self):
+        self.current = next(self._frames, None)
+        if self.current is None:
+            return False, None
+        if self.realtime:
+            now = time.perf_counter()
+            if self._t0 is None:
+                self._t0 = now - self.current.timestamp
+            delay = self._t0 + self.current.timestamp - now
+            if delay > 0:
+                time.sleep(delay)
+        if self.background is not None:
+            return True, self.background.copy()
+        return True, np.zeros((self.reader.height, self.reader.width, 3), dtype=np.uint8)
+
+    def mode_inputs(self):
+        # (landmarks, fingers, finger_count, handedness) as modules/main.py hands them to the mode handlers
+        from modules.utils import count_fingers
+        hand = self.current.hand if self.current else None
+        if not hand:
+            return None, [0, 0, 0, 0, 0], 0, "Right"
+        handedness = hand.handedness or "Right"
+        finger_count, fingers = count_fingers(hand, handedness)
+        return hand.pixels(), fingers, finger_count, handedness
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        self.reader.close()
@@ -0,0 +1,59 @@
+import time
+import numpy as np
+
+
+class Landmarks:
+    """Landmarks of one hand or face as a contiguous float32 (N, 3) array.
+
+    Columns are [x, y, z]: x and y in pixels of the analysed frame (sub-pixel,
+    not truncated), z is MediaPipe's relative depth. Behaves like an array
+    through np.asarray(), so downstream math can stay vectorized.
+    """
+
+    __slots__ = ("points", "handedness", "confidence", "timestamp")
+
+    def __init__(self, points, handedness=None, confidence=1.0, timestamp=None):
+        self.points = np.ascontiguousarray(points, dtype=np.float32)
+        self.handedness = handedness
+        self.confidence = confidence
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+
+    @classmethod
+    def from_mediapipe(cls, landmark_list, width, height, handedness=None, confidence=1.0, timestamp=None):
+        lms = landmark_list.landmark
+        points = np.fromiter((c for lm in lms for c in (lm.x, lm.y, lm.z)), dtype=np.float32, count=3 * len(lms))
+        points = points.reshape(-1, 3)
+        points *= np.array([width, height, 1.0], dtype=np.float32)
+        return cls(points, handedness, confidence, timestamp)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __bool__(self):
+        return len(self.points) > 0
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or dtype == self.points.dtype:
+            return self.points
+        return self.points.astype(dtype)
+
+    def __repr__(self):
+        return f"Landmarks(n={len(self)}, handedness={self.handedness!r}, confidence={self.confidence:.2f})"
+
+    @property
+    def xy(self):
+        return self.points[:, :2]
+
+    def pixel(self, idx):
+        # Integer (x, y) tuple for cv2 drawing calls
+        return (int(self.points[idx, 0]), int(self.points[idx, 1]))
+
+    def pixels(self):
+        return [tuple(p) for p in self.points[:, :2].astype(np.int32).tolist()]
+
+    def to_list(self):
+        # Legacy [id, x, y, z] rows
+        return [[i, x, y, z] for i, (x, y, z) in enumerate(self.points.tolist())]
+
+    def with_points(self, points):
+        return Landmarks(points, self.handedness, self.confidence, self.timestamp)
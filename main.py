@@ -1,27 +1,121 @@
+import argparse
+import time
 import cv2
 import numpy as np
-import pyautogui
 from hand_tracking import HandTracker
 from face_tracking import FaceTracker
 from gesture_recognition import GestureRecognizer
 from hud_renderer import HUDRenderer
+from video_capture import open_capture, parse_source
+from parallel_tracking import ParallelTrackers
+from scheduler import StageScheduler, ON_DEMAND
+from landmark_trace import TraceRecorder, ReplaySource
+from keyboard_layout import LAYOUTS
+from action_dispatcher import ActionDispatcher, NullBackend
+from cursor_output import CursorInterpolator
+from telemetry import Telemetry
+import display as display_output
 
-# Configure PyAutoGUI
-# Set failsafe to True but we clamp coordinates to avoid the corners
-pyautogui.FAILSAFE = True
-SCREEN_W, SCREEN_H = pyautogui.size()
+WINDOW = "HCI Workstation Interface"
 
-def main():
-    # Initialize camera
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+# Cursor mapping target when OS input is off (replay, --no-actions): no display server needed
+VIRTUAL_SCREEN = (1920, 1080)
+
+def screen_size():
+    # Imported on demand so runs without OS input never connect to a display
+    import pyautogui
+    # Set failsafe to True but we clamp coordinates to avoid the corners
+    pyautogui.FAILSAFE = True
+    return pyautogui.size()
+
+# Run HandTracker and FaceTracker in two worker processes fed through shared memory,
+# so a frame costs the slower of the two graphs instead of their sum (the face
+# worker only exists when the HUD consumes face landmarks)
+PARALLEL_TRACKING = False
+
+# Landmark filter driving the cursor: "moving_average", "ema", "one_euro" (low jitter
+# at rest, low lag in fast motion) or None
+HAND_SMOOTHING = "moving_average"
+
+# Cadence of each analysis stage: None = every frame, a number = max runs per second,
+# ON_DEMAND = only when a consumer actually asks for the result
+STAGE_RATES = {
+    "hand": None,
+    "face_mesh": ON_DEMAND,
+    "gesture": None,
+    "swipe": None,
+}
+
+# Landmark traces: RECORD_TRACE = path to append what the trackers saw this session,
+# REPLAY_TRACE = path to replay instead of the camera (no MediaPipe, no OS input)
+RECORD_TRACE = None
+REPLAY_TRACE = None
+
+# Cursor updates per second, interpolated between camera frames on a timer thread
+# (match the display refresh rate), or None to move once per processed frame.
+# CURSOR_LATENCY is the interpolation delay in seconds (None = one frame interval);
+# CURSOR_EXTRAPOLATE predicts ahead instead, allowing a smaller delay.
+CURSOR_RATE_HZ = 120
+CURSOR_LATENCY = None
+CURSOR_EXTRAPOLATE = False
+
+# Per-stage timing (capture, tracking, gesture, HUD, display...) with rolling
+# p50/p95/p99/max. 'T' toggles it with its on-screen table at runtime;
+# TELEMETRY_EXPORT = path (.json or .csv) rewritten every 10 s while enabled.
+TELEMETRY = False
+TELEMETRY_EXPORT = None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HCI workstation interface")
+    display_output.add_arguments(parser)
+    parser.add_argument("--source", type=parse_source, default=0, help="camera index, video file or stream URL")
+    parser.add_argument("--no-actions", action="store_true", help="recognize gestures without moving the mouse or pressing keys")
+    parser.add_argument("--telemetry", metavar="PATH", nargs="?", const="",
+                        help="enable per-stage telemetry from the start, optionally exporting it to PATH (.json/.csv)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if REPLAY_TRACE:
+        cap = ReplaySource(REPLAY_TRACE, realtime=True)
+    else:
+        # Initialize camera (threaded, always serves the newest frame); video files play every frame
+        cap = open_capture(args.source, width=1280, height=720, realtime=True)
+    recorder = None
+    actions_enabled = not REPLAY_TRACE and not args.no_actions
+    screen_w, screen_h = screen_size() if actions_enabled else VIRTUAL_SCREEN
+    # OS input runs on its own thread; pending cursor moves collapse to the newest target
+    actions = ActionDispatcher(None if actions_enabled else NullBackend())
+    cursor = None
+    if CURSOR_RATE_HZ:
+        cursor = CursorInterpolator(actions.moveTo, CURSOR_RATE_HZ, CURSOR_LATENCY, CURSOR_EXTRAPOLATE)
     
     # Initialize modules
-    hand_tracker = HandTracker(max_num_hands=1, min_detection_confidence=0.8)
-    face_tracker = FaceTracker(max_num_faces=1)
+    hand_kwargs = dict(max_num_hands=1, min_detection_confidence=0.8, smoothing=HAND_SMOOTHING)
+    face_kwargs = dict(max_num_faces=1)
+    trackers = None
     recognizer = GestureRecognizer()
     renderer = HUDRenderer()
+    if REPLAY_TRACE:
+        pass  # Landmarks come from the trace, no MediaPipe graphs needed
+    elif PARALLEL_TRACKING:
+        # The face worker would run on every frame: only start it if the HUD draws faces
+        trackers = ParallelTrackers(hand_kwargs, face_kwargs if renderer.uses_face_landmarks else False)
+    else:
+        hand_tracker = HandTracker(**hand_kwargs)
+        face_tracker = FaceTracker(**face_kwargs)
+    
+    telemetry_export = args.telemetry or TELEMETRY_EXPORT
+    telemetry = Telemetry(enabled=TELEMETRY or args.telemetry is not None, export_path=telemetry_export)
+    # Window, or headless with keys from stdin / signals (SIGUSR1 = 'M', SIGUSR2 = 'K')
+    display = display_output.from_args(args, WINDOW, signals={"SIGUSR1": "m", "SIGUSR2": "k"})
+    scheduler = StageScheduler(telemetry=telemetry)
+    if trackers is None and not REPLAY_TRACE:
+        scheduler.add("hand", lambda img, t: hand_tracker.process(img, t).hand(), STAGE_RATES["hand"])
+        scheduler.add("face_mesh", lambda img, t: list(face_tracker.process(img, t).faces),
+                      STAGE_RATES["face_mesh"], default=[])
+    scheduler.add("gesture", recognizer.get_gesture, STAGE_RATES["gesture"], default="None")
+    scheduler.add("swipe", recognizer.detect_swipe, STAGE_RATES["swipe"], event=True)
     
     clicking = False
     right_clicking = False
@@ -35,6 +129,8 @@ def main():
     print("SAFETY CONTROLS:")
     print(" - Press 'M' to Toggle AI Mouse Control")
     print(" - Press 'K' to Toggle Virtual Keyboard")
+    print(" - Press 'L' to Cycle Keyboard Layout")
+    print(" - Press 'T' to Toggle Performance Telemetry")
     print(" - Press 'Q' to Terminate System")
     print("\nOPERATION MANUAL:")
     print(" 1. Move Mouse: Point index (when active)")
@@ -43,19 +139,44 @@ def main():
     print("="*40)
 
     while True:
-        success, img = cap.read()
+        telemetry.begin_frame()
+        with telemetry.stage("capture"):
+            if REPLAY_TRACE:
+                success, img = cap.read()
+                frame_time = time.perf_counter()
+            else:
+                # Capture time of the frame: cursor targets and traces are stamped with it
+                img, frame_time, _ = cap.read_latest(None)
+                success = img is not None
         if not success:
             break
             
+        # A failsafe stop (also from the cursor thread's moves) ends the program here
+        actions.check()
+        
         h_cam, w_cam, _ = img.shape
         img = cv2.flip(img, 1)
         
-        # 1. Track Hands & Analytics
-        img = hand_tracker.find_hands(img, draw=False)
-        hand_lms = hand_tracker.get_landmarks(img)
-        
-        # 2. Track Face Mesh
-        img, face_lms = face_tracker.find_face_mesh(img, draw=False)
+        if REPLAY_TRACE:
+            # 1 + 2. Recorded landmarks
+            hand_lms = cap.current.hand
+            face_lms = cap.current.faces
+        elif trackers is not None:
+            # 1 + 2. Hands and face mesh concurrently in the worker processes
+            with telemetry.stage("tracking"):
+                result = trackers.process(img)
+            hand_lms = result.hand
+            face_lms = result.faces
+        else:
+            # 1. Track Hands & Analytics
+            hand_lms = scheduler.run("hand", img, frame_time)
+            
+            # 2. Track Face Mesh (only pay for it if the HUD consumes it)
+            scheduler.run("face_mesh", img, frame_time)
+            if renderer.uses_face_landmarks:
+                face_lms = scheduler.result("face_mesh")
+            else:
+                face_lms = scheduler.cached("face_mesh")
         
         # 3. Recognize Gestures
         gesture = "None"
@@ -64,77 +185,101 @@ def main():
         active_key = None
         
         if hand_lms:
-            gesture = recognizer.get_gesture(hand_lms)
-            swipe = recognizer.detect_swipe(hand_lms)
+            gesture = scheduler.run("gesture", hand_lms)
+            swipe = scheduler.run("swipe", hand_lms)
             analytics = recognizer.analytics
             
             # --- CURSOR & CLICKS ---
-            target_x = np.interp(analytics['screen_pos'][0], (150, w_cam-150), (2, SCREEN_W - 2))
-            target_y = np.interp(analytics['screen_pos'][1], (150, h_cam-150), (2, SCREEN_H - 2))
+            target_x = np.interp(analytics['screen_pos'][0], (150, w_cam-150), (2, screen_w - 2))
+            target_y = np.interp(analytics['screen_pos'][1], (150, h_cam-150), (2, screen_h - 2))
             
             # Only move mouse if AI control is active
-            if mouse_active:
-                try:
-                    pyautogui.moveTo(target_x, target_y, _pause=False)
-                except: pass
+            if mouse_active and actions_enabled:
+                if cursor is not None:
+                    cursor.update(target_x, target_y, frame_time)
+                else:
+                    actions.moveTo(target_x, target_y)
+            elif cursor is not None:
+                cursor.reset()
             
             # --- KEYBOARD COLLISION ---
             if kb_mode:
-                cur_x, cur_y = analytics['screen_pos']
-                keys = ["QWERTYUIOP", "ASDFGHJKL", "ZXCVBNM"]
-                start_x, start_y = 400, 450
-                k_size, gap = 50, 10
-                for r_idx, row in enumerate(keys):
-                    for c_idx, char in enumerate(row):
-                        kx = start_x + (c_idx * (k_size + gap)) + (r_idx * 20)
-                        ky = start_y + (r_idx * (k_size + gap))
-                        if kx < cur_x < kx + k_size and ky < cur_y < ky + k_size:
-                            active_key = char
+                key_hit = renderer.keyboard_layout(img.shape).key_at(*analytics['screen_pos'])
+                active_key = key_hit.label if key_hit else None
             
             # --- GESTURE EXECUTION ---
-            if gesture == "Pinch":
-                if not clicking:
-                    if kb_mode and active_key:
-                        pyautogui.press(active_key.lower())
-                    elif mouse_active:
-                        pyautogui.click()
-                    clicking = True
-            else:
-                clicking = False
+            if actions_enabled:
+                if gesture == "Pinch":
+                    if not clicking:
+                        if kb_mode and active_key:
+                            actions.press(key_hit.output)
+                        elif mouse_active:
+                            actions.click()
+                        clicking = True
+                else:
+                    clicking = False
                 
-            if gesture == "Two-Finger" and mouse_active:
-                if not right_clicking:
-                    pyautogui.rightClick()
-                    right_clicking = True
-            else:
-                right_clicking = False
+                if gesture == "Two-Finger" and mouse_active:
+                    if not right_clicking:
+                        actions.rightClick()
+                        right_clicking = True
+                else:
+                    right_clicking = False
 
-            # --- SCREEN / WINDOW SWITCHING ---
-            if swipe == "Left":
-                pyautogui.hotkey('ctrl', 'win', 'left')
-            elif swipe == "Right":
-                pyautogui.hotkey('ctrl', 'win', 'right')
-            elif swipe == "Up" or swipe == "Down":
-                pyautogui.hotkey('alt', 'tab')
+                # --- SCREEN / WINDOW SWITCHING ---
+                if swipe == "Left":
+                    actions.hotkey('ctrl', 'win', 'left')
+                elif swipe == "Right":
+                    actions.hotkey('ctrl', 'win', 'right')
+                elif swipe == "Up" or swipe == "Down":
+                    actions.hotkey('alt', 'tab')
+        elif cursor is not None:
+            # Hand lost: hold the pointer instead of gliding on stale targets
+            cursor.reset()
+            
+        if RECORD_TRACE:
+            if recorder is None:
+                recorder = TraceRecorder(RECORD_TRACE, w_cam, h_cam, record_faces=renderer.uses_face_landmarks)
+            recorder.record(frame_time, hand_lms, face_lms, gesture, swipe)
             
-        # 4. Render AR HUD
-        img = renderer.draw_hud(img, hand_lms, face_lms, gesture, swipe, analytics, kb_mode, active_key)
+        # 4. Render AR HUD (skipped when headless without a sink: nobody sees it)
+        if display.renders:
+            with telemetry.stage("hud"):
+                img = renderer.draw_hud(img, hand_lms, face_lms, gesture, swipe, analytics, kb_mode, active_key)
+            telemetry.draw(img)
         
         # Display
-        cv2.imshow("HCI Workstation Interface", img)
+        with telemetry.stage("display"):
+            display.show(img)
+            key = display.poll_key()
+        telemetry.end_frame()
         
         # Hotkeys
-        key = cv2.waitKey(1) & 0xFF
         if key == ord('q'):
             break
         elif key == ord('k'):
             kb_mode = not kb_mode
+        elif key == ord('t'):
+            telemetry.enabled = not telemetry.enabled
+            telemetry.reset()
+        elif key == ord('l'):
+            names = list(LAYOUTS)
+            renderer.keyboard_name = names[(names.index(renderer.keyboard_name) + 1) % len(names)]
         elif key == ord('m'):
             mouse_active = not mouse_active
             print(f"[SYSTEM] AI Mouse Control: {'ENABLED' if mouse_active else 'DISABLED (Terminal Safety)'}")
             
     cap.release()
-    cv2.destroyAllWindows()
+    if telemetry.enabled and telemetry_export:
+        telemetry.export()
+    if cursor is not None:
+        cursor.close()
+    actions.close()
+    if recorder is not None:
+        recorder.close()
+    if trackers is not None:
+        trackers.close()
+    display.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,290 @@
+import json
+import os
+import struct
+import threading
+import zlib
+import cv2
+import numpy as np
+
+# File layout:
+#   MAGIC, u32 metadata length, metadata JSON (size, tile), then any number of chunks.
+#   Chunk: u32 header length, header JSON (tile keys, payload size), zlib payload holding
+#   the chunk's color tiles followed by its mask tiles.
+MAGIC = b"HCICANVAS1\n"
+CHUNK_TILES = 64
+
+
+class Canvas:
+    """Sparse drawing layer made of fixed-size tiles that only exist where there is ink.
+
+    Each tile holds a color image and a uint8 coverage mask, both updated as
+    strokes are drawn, so compositing is one masked copy per inked tile and
+    memory follows the amount of ink rather than the resolution. Clearing
+    drops the tiles. The drawing is saved or loaded on a background thread;
+    a file saved at another resolution is re-projected with resize().
+    """
+
+    def __init__(self, width, height, tile=64):
+        self.width, self.height = width, height
+        self.tile = tile
+        self.tiles = {}  # (row, col) -> (image (t, t, 3), mask (t, t))
+        self._shared = set()  # Tiles also referenced by a save in progress
+        self._io = None
+        self._loaded = None   # Result of a background load, applied on the frame thread
+        self._load_gen = 0    # Bumped by clear() so a load still running is discarded
+        self.io_error = None
+
+    # ---- Drawing ----
+
+    def _tile(self, key):
+        t = self.tiles.get(key)
+        if t is None:
+            t = self.tiles[key] = (np.zeros((self.tile, self.tile, 3), dtype=np.uint8),
+                                   np.zeros((self.tile, self.tile), dtype=np.uint8))
+        elif key in self._shared:
+            # Copy-on-write: the saver thread still reads the old arrays
+            t = self.tiles[key] = (t[0].copy(), t[1].copy())
+            self._shared.discard(key)
+        return t
+
+    def line(self, pt1, pt2, color, thickness=1, clip=None):
+        """Draw like cv2.line; `clip` (x1, y1, x2, y2) limits the pixels touched."""
+        self._apply_loaded()
+        pad = thickness // 2 + 2
+        x1, y1 = max(0, min(pt1[0], pt2[0]) - pad), max(0, min(pt1[1], pt2[1]) - pad)
+        x2 = min(self.width, max(pt1[0], pt2[0]) + pad + 1)
+        y2 = min(self.height, max(pt1[1], pt2[1]) + pad + 1)
+        if x1 >= x2 or y1 >= y2:
+            return
+        # Rasterize once into a scratch mask covering the stroke, then spread it over tiles.
+        # The scratch always covers the whole segment: clipping the rasterization
+        # itself would shift thick line edges by a pixel.
+        stroke = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+        cv2.line(stroke, (pt1[0] - x1, pt1[1] - y1), (pt2[0] - x1, pt2[1] - y1), 255, thickness)
+        if clip is not None:
+            cx1, cy1 = max(x1, clip[0]), max(y1, clip[1])
+            cx2, cy2 = min(x2, clip[2]), min(y2, clip[3])
+            if cx1 >= cx2 or cy1 >= cy2:
+                return
+            stroke = stroke[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1]
+            x1, y1, x2, y2 = cx1, cy1, cx2, cy2
+        t = self.tile
+        for row in range(y1 // t, (y2 - 1) // t + 1):
+            for col in range(x1 // t, (x2 - 1) // t + 1):
+                ty1, tx1 = max(y1, row * t), max(x1, col * t)
+                ty2, tx2 = min(y2, (row + 1) * t), min(x2, (col + 1) * t)
+                sub = stroke[ty1 - y1:ty2 - y1, tx1 - x1:tx2 - x1]
+                if not sub.any():
+                    continue
+                image, mask = self._tile((row, col))
+                ys, xs = slice(ty1 - row * t, ty2 - row * t), slice(tx1 - col * t, tx2 - col * t)
+                image[ys, xs][sub > 0] = color
+                cv2.bitwise_or(mask[ys, xs], sub, mask[ys, xs])
+
+    def clear(self):
+        # Also cancels a load in progress: clearing must not be undone by it
+        self._load_gen += 1
+        self._loaded = None
+        self.tiles = {}
+        self._shared.clear()
+
+    def clear_region(self, x1, y1, x2, y2):
+        """Erase everything inside [x1, x2) x [y1, y2), dropping tiles left without ink."""
+        self._apply_loaded()
+        t = self.tile
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(self.width, x2), min(self.height, y2)
+        if x1 >= x2 or y1 >= y2:
+            return
+        for row in range(y1 // t, (y2 - 1) // t + 1):
+            for col in range(x1 // t, (x2 - 1) // t + 1):
+                if (row, col) not in self.tiles:
+                    continue
+                ys = slice(max(y1, row * t) - row * t, min(y2, (row + 1) * t) - row * t)
+                xs = slice(max(x1, col * t) - col * t, min(x2, (col + 1) * t) - col * t)
+                image, mask = self._tile((row, col))
+                image[ys, xs] = 0
+                mask[ys, xs] = 0
+                if not mask.any():
+                    del self.tiles[(row, col)]
+
+    def copy(self):
+        # A load still running is part of the drawing: a copy taken now must include it
+        self.wait()
+        other = Canvas(self.width, self.height, self.tile)
+        other.tiles = {k: (image.copy(), mask.copy()) for k, (image, mask) in self.tiles.items()}
+        return other
+
+    def overlay(self, other):
+        """Paint another canvas of the same size and tiling over this one."""
+        other._apply_loaded()
+        for key, (image, mask) in other.tiles.items():
+            own_image, own_mask = self._tile(key)
+            cv2.copyTo(image, mask, own_image)
+            cv2.bitwise_or(own_mask, mask, own_mask)
+        return self
+
+    def composite(self, img):
+        """Paint the canvas over img in place."""
+        self._apply_loaded()
+        t = self.tile
+        for (row, col), (image, mask) in self.tiles.items():
+            y, x = row * t, col * t
+            h, w = min(t, self.height - y), min(t, self.width - x)
+            cv2.copyTo(image[:h, :w], mask[:h, :w], img[y:y + h, x:x + w])
+        return img
+
+    @property
+    def nbytes(self):
+        return len(self.tiles) * self.tile * self.tile * 4
+
+    # ---- Dense conversion / resolution changes ----
+
+    def to_arrays(self):
+        """Dense (image, mask) copies of the whole canvas."""
+        self._apply_loaded()
+        image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        t = self.tile
+        for (row, col), (tile_image, tile_mask) in self.tiles.items():
+            y, x = row * t, col * t
+            h, w = min(t, self.height - y), min(t, self.width - x)
+            image[y:y + h, x:x + w] = tile_image[:h, :w]
+            mask[y:y + h, x:x + w] = tile_mask[:h, :w]
+        return image, mask
+
+    @property
+    def image(self):
+        return self.to_arrays()[0]
+
+    def _set_dense(self, image, mask):
+        t = self.tile
+        self.tiles = {}
+        self._shared.clear()
+        rows, cols = -(-self.height // t), -(-self.width // t)
+        padded = np.zeros((rows * t, cols * t), dtype=np.uint8)
+        padded[:self.height, :self.width] = mask
+        inked = padded.reshape(rows, t, cols, t).any(axis=(1, 3))
+        for row, col in zip(*np.nonzero(inked)):
+            y, x = row * t, col * t
+            h, w = min(t, self.height - y), min(t, self.width - x)
+            tile_image, tile_mask = self._tile((int(row), int(col)))
+            tile_image[:h, :w] = image[y:y + h, x:x + w]
+            tile_mask[:h, :w] = mask[y:y + h, x:x + w]
+
+    def resize(self, width, height):
+        """Re-project the drawing onto a canvas of a different resolution."""
+        if (width, height) == (self.width, self.height):
+            return self
+        image, mask = self.to_arrays()
+        self.width, self.height = width, height
+        if self.tiles:
+            self._set_dense(cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST),
+                            cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST))
+        return self
+
+    # ---- Persistence ----
+
+    @property
+    def busy(self):
+        return self._io is not None and self._io.is_alive()
+
+    def wait(self, timeout=None):
+        """Wait for a background save/load to finish."""
+        if self._io is not None:
+            self._io.join(timeout)
+        self._apply_loaded()
+
+    def save(self, path, background=True):
+        """Write the drawing to `path`; by default on a thread, from a snapshot taken now."""
+        self.wait()
+        snapshot = dict(self.tiles)
+        self._shared = set(snapshot)
+        meta = {"version": 1, "width": self.width, "height": self.height, "tile": self.tile}
+        return self._start_io(_write_canvas, path, meta, snapshot, background=background)
+
+    def load(self, path, background=True):
+        """Replace the drawing with the one in `path`, re-projected to this canvas' size.
+
+        A background load is swapped in on the next draw/composite call after
+        it finished, so the frame loop never sees a half-loaded canvas.
+        """
+        self.wait()
+        return self._start_io(self._read, path, self._load_gen, background=background)
+
+    def _start_io(self, fn, *args, background=True):
+        self.io_error = None
+        if not background:
+            fn(*args)
+            self._apply_loaded()
+            return None
+        self._io = threading.Thread(target=self._run_io, args=(fn,) + args, name="CanvasIO", daemon=True)
+        self._io.start()
+        return self._io
+
+    def _run_io(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            self.io_error = e
+
+    def _read(self, path, gen):
+        loaded = _read_canvas(path)
+        if gen == self._load_gen:
+            self._loaded = loaded
+
+    def _apply_loaded(self):
+        loaded, self._loaded = self._loaded, None
+        if loaded is None:
+            return
+        meta, tiles = loaded
+        if meta["tile"] == self.tile and (meta["width"], meta["height"]) == (self.width, self.height):
+            self.tiles = tiles
+            self._shared.clear()
+            return
+        source = Canvas(meta["width"], meta["height"], meta["tile"])
+        source.tiles = tiles
+        width, height = self.width, self.height
+        self.width, self.height = source.width, source.height
+        self._set_dense(*source.to_arrays())
+        self.resize(width, height)
+
+
+def _write_canvas(path, meta, tiles):
+    tmp = path + ".tmp"
+    keys = sorted(tiles)
+    with open(tmp, "wb") as f:
+        header = json.dumps(meta).encode()
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for i in range(0, len(keys), CHUNK_TILES):
+            chunk = keys[i:i + CHUNK_TILES]
+            images = np.stack([tiles[k][0] for k in chunk])
+            masks = np.stack([tiles[k][1] for k in chunk])
+            payload = zlib.compress(images.tobytes() + masks.tobytes(), 1)
+            header = json.dumps({"tiles": [list(k) for k in chunk], "size": len(payload)}).encode()
+            f.write(struct.pack("<I", len(header)) + header + payload)
+    # Never leave a half-written drawing behind
+    os.replace(tmp, path)
+
+
+def _read_canvas(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a canvas file")
+        (n,) = struct.unpack("<I", f.read(4))
+        meta = json.loads(f.read(n))
+        t = meta["tile"]
+        tiles = {}
+        while True:
+            raw = f.read(4)
+            if len(raw) < 4:
+                break
+            (n,) = struct.unpack("<I", raw)
+            header = json.loads(f.read(n))
+            data = zlib.decompress(f.read(header["size"]))
+            count = len(header["tiles"])
+            split = count * t * t * 3
+            images = np.frombuffer(data[:split], dtype=np.uint8).reshape(count, t, t, 3)
+            masks = np.frombuffer(data[split:], dtype=np.uint8).reshape(count, t, t)
+            for key, image, mask in zip(header["tiles"], images, masks):
+                tiles[tuple(key)] = (image.copy(), mask.copy())
+    return meta, tiles
@@ -1,12 +1,23 @@
-import pyautogui
-
 # ======================== CONFIGURATION ========================
 # These will be updated dynamically based on camera's native resolution
 wCam, hCam = 1280, 720  # Default, will be updated
 frameR = 100
 smoothening = 3  # Lower = faster mouse movement
 
-wScr, hScr = pyautogui.size()
+_screen_size = None
+
+def screen_size():
+    """Screen resolution, queried on first use (importing pyautogui is slow)."""
+    global _screen_size
+    if _screen_size is None:
+        import pyautogui
+        _screen_size = pyautogui.size()
+    return _screen_size
+
+# Drawing mode keeps its canvas here between sessions ('S' saves, quitting saves too)
+DRAWING_FILE = "drawing.hcicanvas"
+# Stroke log export ('E' in drawing mode)
+STROKES_FILE = "drawing_strokes.json"
 
 def set_resolution(width, height):
     """Update the global resolution values based on camera detection."""
@@ -1,16 +1,23 @@
+import os
 import cv2
 import numpy as np
 from .config import *
+from .pipeline import HAND, FINGERS, SKELETON
+from .canvas import Canvas
+from .strokes import StrokeLog
 
 # ======================== DRAWING MODE ========================
+REQUIRES = {HAND, FINGERS, SKELETON}
 # Drawing state
-canvas = np.zeros((hCam, wCam, 3), dtype=np.uint8)
+base = Canvas(wCam, hCam)    # Drawing loaded from DRAWING_FILE
+canvas = Canvas(wCam, hCam)  # Strokes of this session, undoable through the log
+strokes = StrokeLog(canvas)
 draw_color_index = 0
 brush_size = 10
-prev_draw_point = None
+prev_finger_count = 0
 
 def drawing_mode(img, landmarks, fingers, finger_count):
-    global canvas, draw_color_index, brush_size, prev_draw_point
+    global draw_color_index, brush_size, prev_finger_count
     
     index_tip = landmarks[8]
     
@@ -31,18 +38,16 @@ def drawing_mode(img, landmarks, fingers, finger_count):
     cv2.putText(img, f"Size: {brush_size}", (wCam - 230, palette_y + 70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
     
     # Instructions
-    cv2.putText(img, "1 Finger: Draw | 2 Fingers: Select Color | 5 Fingers: Clear | 3 Fingers: Size", 
+    cv2.putText(img, "1 Finger: Draw | 2 Fingers: Select Color | 5 Fingers: Clear | 3 Fingers: Size | 4 Fingers: Undo", 
                 (20, hCam - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
     
     # 1 FINGER: Draw
     if finger_count == 1 and fingers[1] == 1:
         cv2.circle(img, index_tip, brush_size, DRAW_COLORS[draw_color_index], -1)
         
-        if prev_draw_point is not None:
-            cv2.line(canvas, prev_draw_point, index_tip, DRAW_COLORS[draw_color_index], brush_size * 2)
-        prev_draw_point = index_tip
+        strokes.add_point(index_tip, DRAW_COLORS[draw_color_index], brush_size * 2)
     else:
-        prev_draw_point = None
+        strokes.end()
     
     # 2 FINGERS: Select Color (hover over palette)
     if finger_count == 2:
@@ -54,34 +59,51 @@ def drawing_mode(img, landmarks, fingers, finger_count):
                     break
         # Check clear button
         if wCam - 150 < index_tip[0] < wCam - 50 and palette_y < index_tip[1] < palette_y + 50:
-            canvas = np.zeros((hCam, wCam, 3), dtype=np.uint8)
+            clear_drawing()
     
     # 3 FINGERS: Change brush size
     if finger_count == 3:
         palm_y = sum([landmarks[i][1] for i in [0, 5, 9, 13, 17]]) // 5
         brush_size = max(5, min(50, int(np.interp(palm_y, (150, hCam - 150), (50, 5)))))
     
+    # 4 FINGERS: Undo the last stroke (once per gesture, not every frame)
+    if finger_count == 4 and prev_finger_count != 4:
+        strokes.undo()
+    prev_finger_count = finger_count
+    
     # 5 FINGERS: Clear canvas
     if finger_count == 5:
-        canvas = np.zeros((hCam, wCam, 3), dtype=np.uint8)
+        clear_drawing()
     
-    # Blend canvas with camera
-    gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-    _, mask = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY)
-    mask_inv = cv2.bitwise_not(mask)
-    img_bg = cv2.bitwise_and(img, img, mask=mask_inv)
-    canvas_fg = cv2.bitwise_and(canvas, canvas, mask=mask)
-    cv2.add(img_bg, canvas_fg, img)
+    # Blend canvas with camera (only inside the painted area)
+    show_canvas(img)
+
+def clear_drawing():
+    base.clear()
+    strokes.clear()
+
+def undo_stroke():
+    return strokes.undo()
+
+def redo_stroke():
+    return strokes.redo()
+
+def export_strokes(path=STROKES_FILE):
+    strokes.export(path)
+
+def save_drawing(path=DRAWING_FILE, background=True):
+    # Flatten now, write on a background thread
+    return base.copy().overlay(canvas).save(path, background)
+
+def load_drawing(path=DRAWING_FILE, background=True):
+    # Swapped in by the frame loop once read; a file saved at another resolution is re-projected
+    if os.path.exists(path):
+        strokes.clear()
+        base.load(path, background)
 
 def get_canvas():
-    global canvas
-    return canvas
+    return base.copy().overlay(canvas).image
 
 def show_canvas(img):
-    global canvas
-    gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-    _, mask = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY)
-    mask_inv = cv2.bitwise_not(mask)
-    img_bg = cv2.bitwise_and(img, img, mask=mask_inv)
-    canvas_fg = cv2.bitwise_and(canvas, canvas, mask=mask)
-    cv2.add(img_bg, canvas_fg, img)
+    base.composite(img)
+    canvas.composite(img)
@@ -1,15 +1,20 @@
 import cv2
-import pyautogui
 import numpy as np
 import time
 from .config import *
+from .pipeline import HAND, FINGERS, SKELETON
 from .utils import get_distance
+from compositor import Compositor
+from action_dispatcher import ActionDispatcher
 
 # ======================== GESTURE CONTROL MODE ========================
+REQUIRES = {HAND, FINGERS, SKELETON}
 pLocX, pLocY = 0, 0
 cLocX, cLocY = 0, 0
 last_click_time = 0  # For click debounce
 last_switch_time = 0  # For app switch debounce
+hud_layer = Compositor()  # Only the HUD box gets copied and blended, not the whole frame
+actions = ActionDispatcher()  # OS input off the frame loop; cursor moves are coalesced
 
 def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
     global pLocX, pLocY, cLocX, cLocY, last_click_time, last_switch_time
@@ -23,9 +28,9 @@ def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
     palm_y = sum([landmarks[i][1] for i in palm_points]) // 5
     
     # Draw HUD
-    overlay = img.copy()
-    cv2.rectangle(overlay, (10, 10), (350, 160), (30, 30, 30), -1)
-    cv2.addWeighted(overlay, 0.7, img, 0.3, 0, img)
+    hud_layer.begin(img)
+    hud_layer.rectangle((10, 10), (350, 160), (30, 30, 30), -1)
+    hud_layer.blend(0.7)
     cv2.putText(img, "GESTURE CONTROL", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, NEON_PINK, 2)
     
     # Draw gesture guide
@@ -36,11 +41,12 @@ def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
     if finger_count == 1 and fingers[1] == 1:
         mode = "MOVE CURSOR"
         x1, y1 = index_tip
+        wScr, hScr = screen_size()
         x3 = np.interp(x1, (frameR, wCam - frameR), (0, wScr))
         y3 = np.interp(y1, (frameR, hCam - frameR), (0, hScr))
         cLocX = pLocX + (x3 - pLocX) / smoothening
         cLocY = pLocY + (y3 - pLocY) / smoothening
-        pyautogui.moveTo(cLocX, cLocY)
+        actions.moveTo(cLocX, cLocY)
         pLocX, pLocY = cLocX, cLocY
         cv2.circle(img, index_tip, 20, NEON_PINK, -1)
         cv2.circle(img, index_tip, 30, NEON_PINK, 2)
@@ -66,7 +72,7 @@ def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
         
         # CLICK when fingers are close (threshold: 60px - much easier!)
         if length < 60 and (current_time - last_click_time) > 0.5:
-            pyautogui.click()
+            actions.click()
             last_click_time = current_time
             mode = "CLICKED!"
             cv2.circle(img, mid_point, 60, NEON_GREEN, -1)
@@ -84,11 +90,11 @@ def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
         cv2.putText(img, "DOWN", (wCam//2 - 30, hCam//2 + 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, NEON_CYAN, 2)
         
         if palm_y < hCam // 2 - 50:
-            pyautogui.scroll(3)
+            actions.scroll(3)
             mode = "SCROLLING UP"
             cv2.arrowedLine(img, (palm_x, palm_y + 50), (palm_x, palm_y - 50), NEON_GREEN, 5)
         elif palm_y > hCam // 2 + 50:
-            pyautogui.scroll(-3)
+            actions.scroll(-3)
             mode = "SCROLLING DOWN"
             cv2.arrowedLine(img, (palm_x, palm_y - 50), (palm_x, palm_y + 50), NEON_GREEN, 5)
 
@@ -98,7 +104,7 @@ def gesture_control_mode(img, landmarks, fingers, finger_count, handedness):
         cv2.circle(img, (palm_x, palm_y), 80, NEON_ORANGE, 3)
         
         if (current_time - last_switch_time) > 1.5:
-            pyautogui.hotkey('alt', 'tab')
+            actions.hotkey('alt', 'tab')
             last_switch_time = current_time
             mode = "SWITCHED!"
             cv2.circle(img, (palm_x, palm_y), 100, NEON_ORANGE, -1)
@@ -1,74 +1,222 @@
+import threading
 import cv2
 import numpy as np
 import time
 from .config import *
 
 # ======================== INVISIBLE CLOAK MODE ========================
-background = None
-capturing_background = True
-capture_count = 0
+# Works on the raw frame only: no hand tracking while the cloak is on
+REQUIRES = set()
+
+# Cloak color model: a hue/saturation histogram, back-projected onto each frame.
+# Brightness is left out on purpose so shading across the cloak does not matter.
+HIST_BINS = [30, 32]            # Hue (0-180), saturation (0-256)
+HIST_RANGES = [0, 180, 0, 256]
+MIN_SAT, MIN_VAL = 50, 40       # Grey and near-black pixels carry no usable hue
+MATCH_THRESHOLD = 40            # Back-projection score (0-255) counted as cloak
+MASK_SCALE = 4                  # Mask is computed at 1/MASK_SCALE resolution
+
+def _hist_from_range(h_lo, h_hi, s_lo=MIN_SAT, s_hi=255):
+    hist = np.zeros(HIST_BINS, dtype=np.float32)
+    hb, sb = 180 // HIST_BINS[0], 256 // HIST_BINS[1]
+    hist[h_lo // hb:h_hi // hb + 1, s_lo // sb:s_hi // sb + 1] = 255
+    return hist
 
 # Default color (Blue-ish) - but will be calibrated
-lower_bound = np.array([100, 50, 50])
-upper_bound = np.array([130, 255, 255])
+cloak_hist = _hist_from_range(100, 130)
 
-def init_invisible_cloak(cap, attempts=30):
-    global background, capturing_background, capture_count
-    
+class BackgroundModel:
+    """Background plate for the cloak, maintained on a worker thread.
+
+    recapture() starts over: the next `warmup` frames are averaged as a
+    plain mean (step out of the frame meanwhile). After that every frame
+    handed to submit() nudges the pixels that are not under the cloak mask
+    towards the current frame, so lighting and auto-exposure drift are
+    followed. "median" moves each pixel by one level per update towards the
+    frame (a running median estimate that ignores brief occlusions); "ema"
+    is an exponential average with weight `alpha`. Updates are limited to
+    `update_hz`, and a frame that arrives while the worker is busy is
+    skipped, so submit() never blocks the render loop.
+    """
+
+    def __init__(self, method="median", alpha=0.02, warmup=30, update_hz=15):
+        if method not in ("median", "ema"):
+            raise ValueError(f"Unknown background method {method!r}, expected 'median' or 'ema'")
+        self.method = method
+        self.alpha = alpha
+        self.warmup = warmup
+        self.update_interval = 1.0 / update_hz if update_hz else 0.0
+        self.background = None  # Latest published uint8 plate, replaced as a whole
+        self.captured = 0       # Warm-up frames collected since the last recapture
+        self._acc = None
+        self._cond = threading.Condition()
+        self._pending = None
+        self._last_update = 0.0
+        self._generation = 0
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.background is not None
+
+    @property
+    def capturing(self):
+        return self._generation > 0 and self.captured < self.warmup
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="BackgroundModel", daemon=True)
+            self._thread.start()
+        return self
+
+    def recapture(self, warmup=None):
+        """Start a new capture; the current plate stays in use until the new one is ready."""
+        with self._cond:
+            if warmup is not None:
+                self.warmup = warmup
+            self._generation += 1
+            self._pending = None
+            self._acc = None
+            self.captured = 0
+        return self.start()
+
+    def submit(self, frame, mask=None):
+        """Offer a frame (and the cloak mask for it); cheap no-op while the worker is busy."""
+        now = time.perf_counter()
+        with self._cond:
+            warming = self.captured < self.warmup
+            if self._pending is not None or (not warming and now - self._last_update < self.update_interval):
+                return False
+            self._last_update = now
+            self._pending = (self._generation, frame.copy(), None if mask is None else mask.copy())
+            self._cond.notify()
+        self.start()
+        return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                generation, frame, mask = self._pending
+                acc, captured, plate = self._acc, self.captured, self.background
+
+            if captured < self.warmup:
+                # Warm-up: running mean of the whole frame
+                if acc is None or acc.shape != frame.shape:
+                    acc, captured = frame.astype(np.float32), 0
+                captured += 1
+                cv2.accumulateWeighted(frame, acc, 1.0 / captured)
+                plate = acc.astype(np.uint8) if captured >= self.warmup else None
+            elif self.method == "ema":
+                # The mask is 0/255, so its inverse selects the pixels outside the cloak
+                cv2.accumulateWeighted(frame, acc, self.alpha, None if mask is None else cv2.bitwise_not(mask))
+                plate = acc.astype(np.uint8)
+            else:
+                up, down = frame > plate, frame < plate
+                if mask is not None:
+                    outside = (mask == 0)[..., None]
+                    up &= outside
+                    down &= outside
+                plate = plate + up.view(np.uint8) - down.view(np.uint8)
+                acc = None  # The plate itself is the state
+
+            with self._cond:
+                self._pending = None
+                if generation != self._generation:
+                    continue  # recapture() was called meanwhile, drop this result
+                self._acc, self.captured = acc, captured
+                if plate is not None:
+                    self.background = plate
+
+background_model = BackgroundModel()
+center_patch = None  # Unprocessed center of the last cloak frame, for calibration
+
+def init_invisible_cloak(attempts=30):
+    # Non-blocking: the next `attempts` frames shown in cloak mode become the background
     print("Capturing background... Please move out of frame!")
+    background_model.recapture(attempts)
+
+def center_region(shape):
+    h, w = shape[:2]
+    return (w//2 - w//10, h//2 - h//10, w//2 + w//10, h//2 + h//10)
+
+def calibrate_color(img, region=None):
+    """Learn the cloak colors from a region (x1, y1, x2, y2), by default a box in the center."""
+    global cloak_hist
     
-    # Warm up and capture background
-    for i in range(attempts):
-        success, background = cap.read()
-        if not success:
-            continue
+    x1, y1, x2, y2 = center_region(img.shape) if region is None else region
+    patch = img[y1:y2, x1:x2]
     
-    background = cv2.flip(background, 1) # Flip to match mirror view
-    capturing_background = False
-    print("Background captured!")
-
-def calibrate_color(img):
-    global lower_bound, upper_bound
+    # Hue/saturation histogram of the usable pixels in the region
+    hsv = cv2.cvtColor(patch, cv2.COLOR_BGR2HSV)
+    valid = cv2.inRange(hsv, (0, MIN_SAT, MIN_VAL), (180, 256, 256))
+    hist = cv2.calcHist([hsv], [0, 1], valid, HIST_BINS, HIST_RANGES)
+    # Spread each bin a little so colors slightly off the sample still match
+    hist = cv2.GaussianBlur(hist, (3, 3), 0)
+    cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+    cloak_hist = hist
     
-    # Sample center pixel
-    h, w, _ = img.shape
-    center_color = img[h//2, w//2]
+    hue_bin = int(np.argmax(hist.sum(axis=1)))
+    print(f"Calibrated Hue: ~{hue_bin * (180 // HIST_BINS[0])} ({int(cv2.countNonZero(valid))} samples)")
+    return tuple(int(c) for c in cv2.mean(patch, mask=valid)[:3])
+
+def cloak_mask(img):
+    """Cloak mask at full resolution, computed on a downscaled copy of the frame."""
+    h, w = img.shape[:2]
+    small = cv2.resize(img, (w // MASK_SCALE, h // MASK_SCALE), interpolation=cv2.INTER_LINEAR)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
     
-    # Convert to HSV
-    center_pixel = np.uint8([[center_color]])
-    hsv_pixel = cv2.cvtColor(center_pixel, cv2.COLOR_BGR2HSV)[0][0]
+    prob = cv2.calcBackProject([hsv], [0, 1], cloak_hist, HIST_RANGES, 1)
+    valid = cv2.inRange(hsv, (0, MIN_SAT, MIN_VAL), (180, 256, 256))
+    cv2.bitwise_and(prob, valid, prob)
+    _, mask = cv2.threshold(prob, MATCH_THRESHOLD, 255, cv2.THRESH_BINARY)
     
-    # Create range (Sensitivity +/- 10 for Hue, broad for Sat/Val)
-    hue = hsv_pixel[0]
-    lower_bound = np.array([max(0, hue - 10), 50, 50])
-    upper_bound = np.array([min(179, hue + 10), 255, 255])
+    # Refine mask (Clean up noise)
+    kernel = np.ones((3, 3), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.dilate(mask, kernel)
     
-    print(f"Calibrated Hue: {hue}")
-    return center_color
+    # Upsample with smooth edges, then binarize again
+    mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR)
+    cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY, mask)
+    return mask
+
+def calibrate_center():
+    # Uses the camera pixels, not the composited output shown on screen
+    if center_patch is not None:
+        return calibrate_color(center_patch, (0, 0, center_patch.shape[1], center_patch.shape[0]))
 
 def invisible_cloak_mode(img):
-    global background, lower_bound, upper_bound
+    global center_patch
     
-    # Convert to HSV for better color detection
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    x1, y1, x2, y2 = center_region(img.shape)
+    center_patch = img[y1:y2, x1:x2].copy()
     
-    # Create mask using calibrated bounds
-    mask = cv2.inRange(hsv, lower_bound, upper_bound)
-    
-    # Refine mask (Clean up noise)
-    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3,3), np.uint8))
-    mask = cv2.morphologyEx(mask, cv2.MORPH_DILATE, np.ones((3,3), np.uint8))
+    if not background_model.ready and not background_model.capturing:
+        init_invisible_cloak()
     
-    # Create the inverse mask (everything NOT cloak)
-    mask_inv = cv2.bitwise_not(mask)
+    if background_model.capturing:
+        # (Re)capturing: feed frames to the worker, keep showing the current plate if any
+        background_model.submit(img)
+        cv2.putText(img, f"CAPTURING BACKGROUND {background_model.captured}/{background_model.warmup} - step out of frame",
+                    (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.7, NEON_YELLOW, 2)
+        if background_model.background is None:
+            return img
     
-    # Segment 1: The cloak area (taken from background)
-    res1 = cv2.bitwise_and(background, background, mask=mask)
+    plate = background_model.background
+    if plate.shape != img.shape:
+        # Frame size changed: capture a new plate once (the old one stays set meanwhile)
+        if not background_model.capturing:
+            background_model.recapture()
+        return img
     
-    # Segment 2: The non-cloak area (taken from current frame)
-    res2 = cv2.bitwise_and(img, img, mask=mask_inv)
+    mask = cloak_mask(img)
+    # Pixels outside the cloak keep the plate up to date (copied before compositing)
+    if not background_model.capturing:
+        background_model.submit(img, mask)
     
-    # Combine them
-    final_output = cv2.addWeighted(res1, 1, res2, 1, 0)
+    # Cloak area is replaced by the background with a single masked copy
+    cv2.copyTo(plate, mask, img)
+    cv2.rectangle(img, (x1, y1), (x2, y2), NEON_CYAN, 1)  # Calibration area
     
-    return final_output
+    return img
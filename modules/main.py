@@ -1,163 +1,350 @@
+import argparse
 import cv2
 import numpy as np
 import time
 import os
+import threading
+import importlib
 
 # Suppress warnings
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
-import mediapipe as mp
-from modules.config import *
-from modules.utils import count_fingers
-import modules.menu_mode as menu_mode
-import modules.gesture_mode as gesture_mode
-import modules.drawing_mode as drawing_mode
-import modules.snake_mode as snake_mode
-
-# ======================== SETUP ========================
-# MediaPipe Setup
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
-
-# Camera Setup - Use DirectShow on Windows for better quality
-cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # DirectShow for Windows
-
-# Request Full HD resolution first (otherwise it often defaults to 640x480)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer for less lag
-
-# Read first frame to detect actual negotiated resolution
-success, first_frame = cap.read()
-
-if success:
-    native_height, native_width = first_frame.shape[:2]
-    from modules.config import set_resolution
-    set_resolution(native_width, native_height)
-    # Re-import wCam, hCam with updated values
-    from modules.config import wCam, hCam
-    print(f"  Camera native resolution: {native_width}x{native_height}")
-    # Reinitialize modules that depend on resolution
-    import importlib
-    importlib.reload(drawing_mode)
-    importlib.reload(snake_mode)
-    importlib.reload(menu_mode)
-    snake_mode.init_snake()
-else:
-    print("  Warning: Could not detect camera resolution, using default 1280x720")
-
-# ======================== GLOBAL STATE ========================
-current_mode = 0  # 0=Menu, 1=Gesture Control, 2=Drawing, 3=Snake Game
-
-# ======================== MAIN LOOP ========================
-print("\n" + "="*60)
-print("   HAND GESTURE CONTROLLER - MULTI-MODE")
-print("="*60)
-print("\n  MODES:")
-print("  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-print("  1. GESTURE CONTROL - Control your computer")
-print("  2. DRAWING MODE    - Draw with your finger")
-print("  3. SNAKE GAME      - Play snake with gestures")
-print("\n  Press 'M' to return to menu")
-print("  Press 'Q' to quit")
-print("="*60 + "\n")
-
-prev_time = time.time()
-frame_count = 0
-
-cv2.namedWindow("Hand Gesture Controller", cv2.WINDOW_NORMAL)
-cv2.setWindowProperty("Hand Gesture Controller", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-
-while True:
-    success, img = cap.read()
+from modules import config
+from modules.config import NEON_CYAN, NEON_GREEN, NEON_YELLOW, WHITE, DRAWING_FILE, STROKES_FILE, set_resolution
+from video_capture import open_capture, parse_source
+from landmark_trace import ReplaySource
+from action_dispatcher import NullBackend
+from modules.pipeline import FramePipeline, ReplayPipeline
+from telemetry import Telemetry
+import display as display_output
+
+WINDOW = "Hand Gesture Controller"
+
+# Mode modules are imported the first time they are opened, after the camera
+# resolution is known, so nothing has to be reloaded for a resolution change
+MODE_MODULES = {
+    0: "modules.menu_mode",
+    1: "modules.gesture_mode",
+    2: "modules.drawing_mode",
+    3: "modules.snake_mode",
+    4: "modules.invisible_mode",
+}
+_mode_cache = {}
+# Set when replaying a trace: modes then send no OS input
+_dry_run = False
+
+def load_mode(mode):
+    module = _mode_cache.get(mode)
+    if module is None:
+        t = time.perf_counter()
+        module = _mode_cache[mode] = importlib.import_module(MODE_MODULES[mode])
+        if mode == 2:
+            # Previous drawing comes back in the background
+            module.load_drawing()
+        if _dry_run and hasattr(module, "actions"):
+            module.actions.backend = NullBackend()
+        print(f"[STARTUP] Loaded {MODE_MODULES[mode]} in {(time.perf_counter() - t) * 1000:.0f} ms")
+    return module
+
+class Startup:
+    """Opens the camera and builds the MediaPipe graph on two threads at once.
+
+    Each step records when it finished (seconds since `t0`) in `timings`, so
+    the breakdown can be printed once the first frame is on screen. With a
+    `replay` trace path the trace is opened instead and MediaPipe is not
+    loaded at all.
+    """
+
+    def __init__(self, source=0, replay=None):
+        self.source = source
+        self.replay = replay
+        self.t0 = time.perf_counter()
+        self.timings = {}
+        self.cap = None
+        self.first_frame = None
+        self.hands = None
+        self.mp = None
+        self.error = None
+        if replay:
+            self._threads = [threading.Thread(target=self._open_replay, name="StartupReplay", daemon=True)]
+        else:
+            self._threads = [
+                threading.Thread(target=self._open_camera, name="StartupCamera", daemon=True),
+                threading.Thread(target=self._load_mediapipe, name="StartupMediaPipe", daemon=True),
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def mark(self, name):
+        self.timings[name] = time.perf_counter() - self.t0
+
+    def _open_camera(self):
+        try:
+            # Camera Setup - Use DirectShow on Windows for better quality
+            # Request Full HD resolution first (otherwise it often defaults to 640x480).
+            # Frames are drained on a background thread so the loop always gets the newest one
+            # (a video file plays every frame at its own rate instead).
+            api = cv2.CAP_DSHOW if isinstance(self.source, int) else None
+            self.cap = open_capture(self.source, api, width=1920, height=1080, realtime=True)
+            self.mark("camera opened")
+            # First frame tells the actually negotiated resolution
+            success, frame = self.cap.read()
+            if success:
+                self.first_frame = frame
+                self.mark("first camera frame")
+            else:
+                self.error = "Could not read from the camera"
+        except Exception as e:
+            self.error = f"Camera failed: {e}"
+
+    def _open_replay(self):
+        try:
+            self.cap = ReplaySource(self.replay, realtime=True)
+            self.mark("trace opened")
+            success, frame = self.cap.read()
+            if success:
+                self.first_frame = frame
+                self.mark("first trace frame")
+            else:
+                self.error = f"{self.replay} contains no frames"
+        except Exception as e:
+            self.error = f"Replay failed: {e}"
+
+    def _load_mediapipe(self):
+        try:
+            import mediapipe as mp
+            self.mark("mediapipe imported")
+            hands = mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=1,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            self.mark("hand model ready")
+            self.mp = mp
+            self.hands = hands
+        except Exception as e:
+            self.error = f"MediaPipe failed: {e}"
+
+    @property
+    def camera_ready(self):
+        return self.first_frame is not None
+
+    @property
+    def hands_ready(self):
+        return self.hands is not None or bool(self.replay)
+
+    def report(self):
+        steps = " | ".join(f"{name} {t * 1000:.0f} ms" for name, t in sorted(self.timings.items(), key=lambda kv: kv[1]))
+        print(f"[STARTUP] {steps}")
+
+def draw_loading(img, startup):
+    h, w = img.shape[:2]
+    dots = "." * (int(time.perf_counter() * 3) % 4)
+    cv2.putText(img, f"STARTING{dots}", (w//2 - 120, h//2 - 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, NEON_CYAN, 3)
+    for i, (label, ready) in enumerate((("Camera", startup.camera_ready), ("Hand tracking", startup.hands_ready))):
+        cv2.putText(img, f"{label}: {'READY' if ready else 'loading'}", (w//2 - 120, h//2 + 10 + i * 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, NEON_GREEN if ready else NEON_YELLOW, 2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hand gesture controller")
+    display_output.add_arguments(parser)
+    parser.add_argument("--source", type=parse_source, default=0, help="camera index, video file or stream URL")
+    parser.add_argument("--replay", metavar="TRACE",
+                        help="feed a recorded landmark trace to the modes instead of camera + MediaPipe (no OS input)")
+    args = parser.parse_args(argv)
     
-    if not success:
-        break
+    global _dry_run
+    _dry_run = bool(args.replay)
+    startup = Startup(args.source, args.replay)
     
-    img = cv2.flip(img, 1)
+    # Window first, so something is on screen while the camera and MediaPipe load.
+    # Headless: no window, keys from stdin / signals (SIGUSR1 = 'M' back to the menu)
+    display = display_output.from_args(args, WINDOW, fullscreen=True, signals={"SIGUSR1": "m"})
+    startup.mark("window")
     
-    imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    # ======================== LOADING ========================
+    placeholder = np.zeros((config.hCam, config.wCam, 3), dtype=np.uint8)
+    while not startup.camera_ready:
+        if startup.error:
+            print(f"  Error: {startup.error}")
+            display.close()
+            return
+        if display.renders:
+            frame = placeholder.copy()
+            draw_loading(frame, startup)
+            display.show(frame)
+        if display.poll_key(15) == ord('q'):
+            display.close()
+            return
     
-    frame_count += 1
-    curr_time = time.time()
-    fps = int(1 / (curr_time - prev_time + 0.001))
-    prev_time = curr_time
+    cap = startup.cap
+    native_height, native_width = startup.first_frame.shape[:2]
+    set_resolution(native_width, native_height)
+    wCam, hCam = native_width, native_height
+    print(f"  Camera native resolution: {native_width}x{native_height}")
     
-    results = hands.process(imgRGB)
+    # ======================== GLOBAL STATE ========================
+    current_mode = 0  # 0=Menu, 1=Gesture Control, 2=Drawing, 3=Snake Game, 4=Invisible Cloak
     
-    finger_pos = None
-    finger_count = 0
-    fingers = [0, 0, 0, 0, 0]
-    landmarks = None
-    handedness = "Right"
+    # ======================== MAIN LOOP ========================
+    print("\n" + "="*60)
+    print("   HAND GESTURE CONTROLLER - MULTI-MODE")
+    print("="*60)
+    print("\n  MODES:")
+    print("  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+    print("  1. GESTURE CONTROL - Control your computer")
+    print("  2. DRAWING MODE    - Draw with your finger")
+    print("  3. SNAKE GAME      - Play snake with gestures")
+    print("  4. INVISIBLE CLOAK - Hide anything of the calibrated color")
+    print("\n  Press 'M' to return to menu")
+    print("  Press 'S' to save the drawing, 'U'/'Y' to undo/redo, 'E' to export strokes (drawing mode)")
+    print("  Press 'T' to toggle performance telemetry")
+    print("  Press 'Q' to quit")
+    print("="*60 + "\n")
     
-    if results.multi_hand_landmarks:
-        for hand_landmarks, handedness_info in zip(results.multi_hand_landmarks, results.multi_handedness):
-            mp_drawing.draw_landmarks(img, hand_landmarks, mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style())
-            
-            handedness = handedness_info.classification[0].label
-            landmarks = [(int(lm.x * wCam), int(lm.y * hCam)) for lm in hand_landmarks.landmark]
-            finger_count, fingers = count_fingers(landmarks, handedness)
-            finger_pos = landmarks[8]
+    pipeline = ReplayPipeline(cap) if args.replay else FramePipeline(startup)
+    telemetry = Telemetry(enabled=False)
+    prev_time = time.time()
+    frame_count = 0
+    first_displayed = False
     
-    # Mode handling
-    if current_mode == 0:  # Menu
-        # draw_menu returns the new mode (or the same one)
-        current_mode = menu_mode.draw_menu(img, finger_pos, finger_count, landmarks, current_mode)
+    while True:
+        telemetry.begin_frame()
+        with telemetry.stage("capture"):
+            if not first_displayed:
+                # The frame startup read for the resolution (a video file must not lose it)
+                success, img = True, startup.first_frame
+            else:
+                success, img = cap.read()
         
-    elif current_mode == 1:  # Gesture Control
-        if landmarks:
-            gesture_mode.gesture_control_mode(img, landmarks, fingers, finger_count, handedness)
-        cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+        if not success:
+            break
         
-    elif current_mode == 2:  # Drawing
-        if landmarks:
-            drawing_mode.drawing_mode(img, landmarks, fingers, finger_count)
-        else:
-            drawing_mode.show_canvas(img)
-        cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+        if not args.replay:
+            # Recorded landmarks are already in mirrored frame coordinates
+            img = cv2.flip(img, 1)
         
-    elif current_mode == 3:  # Snake Game
-        if landmarks:
-            snake_mode.snake_game_mode(img, landmarks, fingers, finger_count, frame_count)
-        else:
-            cv2.putText(img, "Show your hand to play!", (wCam//2 - 180, hCam//2), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, WHITE, 2)
-        cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
-    
-    # FPS display
-    cv2.putText(img, f"FPS: {fps}", (wCam - 100, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, NEON_GREEN, 1)
-    
-    cv2.imshow("Hand Gesture Controller", img)
+        frame_count += 1
+        curr_time = time.time()
+        fps = int(1 / (curr_time - prev_time + 0.001))
+        prev_time = curr_time
+        
+        # Only the stages the active mode declared run this frame
+        mode_module = load_mode(current_mode)
+        with telemetry.stage("pipeline"):
+            inputs = pipeline.run(img, mode_module.REQUIRES)
+        landmarks, fingers, finger_count = inputs.landmarks, inputs.fingers, inputs.finger_count
+        finger_pos, handedness = inputs.finger_pos, inputs.handedness
+        
+        if mode_module.REQUIRES and not startup.hands_ready:
+            if startup.error:
+                print(f"  Error: {startup.error}")
+                break
+            # Camera is live, hand model still loading
+            draw_loading(img, startup)
+        
+        # Mode handling
+        mode_stage, mode_start = f"mode {current_mode}", time.perf_counter()
+        if current_mode == 0:  # Menu
+            # draw_menu returns the new mode (or the same one)
+            current_mode = load_mode(0).draw_menu(img, finger_pos, finger_count, landmarks, current_mode)
+            
+        elif current_mode == 1:  # Gesture Control
+            if landmarks:
+                load_mode(1).gesture_control_mode(img, landmarks, fingers, finger_count, handedness)
+            cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+            
+        elif current_mode == 2:  # Drawing
+            drawing_mode = load_mode(2)
+            if landmarks:
+                drawing_mode.drawing_mode(img, landmarks, fingers, finger_count)
+            else:
+                drawing_mode.show_canvas(img)
+            cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+            
+        elif current_mode == 3:  # Snake Game
+            if landmarks:
+                load_mode(3).snake_game_mode(img, landmarks, fingers, finger_count, frame_count)
+            else:
+                cv2.putText(img, "Show your hand to play!", (wCam//2 - 180, hCam//2), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, WHITE, 2)
+            cv2.putText(img, "[M] Menu | [Q] Quit", (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+            
+        elif current_mode == 4:  # Invisible Cloak
+            img = load_mode(4).invisible_cloak_mode(img)
+            cv2.putText(img, "[C] Calibrate color (center) | [B] Recapture background | [M] Menu | [Q] Quit",
+                        (10, hCam - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+        
+        telemetry.record(mode_stage, time.perf_counter() - mode_start)
+        telemetry.draw(img)
+        
+        # FPS display
+        cv2.putText(img, f"FPS: {fps}", (wCam - 100, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, NEON_GREEN, 1)
+        
+        with telemetry.stage("display"):
+            display.show(img)
+            key = display.poll_key()
+        telemetry.end_frame()
+        if not first_displayed:
+            startup.mark("first frame displayed")
+            startup.report()
+            first_displayed = True
+            hands_reported = startup.hands_ready
+        elif not hands_reported and startup.hands_ready:
+            # Hand model finished after the first frame: report the complete breakdown
+            startup.report()
+            hands_reported = True
+        
+        if key == ord('q'):
+            break
+        elif key == ord('t'):
+            telemetry.enabled = not telemetry.enabled
+            telemetry.reset()
+        elif key == ord('m'):
+            current_mode = 0
+        elif key == ord('s') and current_mode == 2:
+            load_mode(2).save_drawing()
+            print(f"[DRAWING] Saving to {DRAWING_FILE}")
+        elif key == ord('u') and current_mode == 2:
+            load_mode(2).undo_stroke()
+        elif key == ord('y') and current_mode == 2:
+            load_mode(2).redo_stroke()
+        elif key == ord('e') and current_mode == 2:
+            load_mode(2).export_strokes()
+            print(f"[DRAWING] Strokes exported to {STROKES_FILE}")
+        # Keyboard shortcuts for menu
+        elif key == ord('1') and current_mode == 0:
+            current_mode = 1
+            print("[KEYBOARD] Selected mode 1: GESTURE CONTROL")
+        elif key == ord('2') and current_mode == 0:
+            current_mode = 2
+            print("[KEYBOARD] Selected mode 2: DRAWING")
+        elif key == ord('3') and current_mode == 0:
+            current_mode = 3
+            print("[KEYBOARD] Selected mode 3: SNAKE GAME")
+        elif key == ord('4') and current_mode == 0:
+            current_mode = 4
+            print("[KEYBOARD] Selected mode 4: INVISIBLE CLOAK")
+        elif key == ord('b') and current_mode == 4:
+            load_mode(4).init_invisible_cloak()
+        elif key == ord('c') and current_mode == 4:
+            load_mode(4).calibrate_center()
     
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('q'):
-        break
-    elif key == ord('m'):
-        current_mode = 0
-    # Keyboard shortcuts for menu
-    elif key == ord('1') and current_mode == 0:
-        current_mode = 1
-        print("[KEYBOARD] Selected mode 1: GESTURE CONTROL")
-    elif key == ord('2') and current_mode == 0:
-        current_mode = 2
-        print("[KEYBOARD] Selected mode 2: DRAWING")
-    elif key == ord('3') and current_mode == 0:
-        current_mode = 3
-        print("[KEYBOARD] Selected mode 3: SNAKE GAME")
-
-cap.release()
-cv2.destroyAllWindows()
-hands.close()
-print("\nController stopped.")
+    cap.release()
+    if 1 in _mode_cache:
+        _mode_cache[1].actions.close()
+    if 2 in _mode_cache and not args.replay:
+        # A replayed session does not overwrite the saved drawing unless 'S' is pressed
+        drawing_mode = _mode_cache[2]
+        if drawing_mode.base.tiles or drawing_mode.canvas.tiles or os.path.exists(DRAWING_FILE):
+            drawing_mode.save_drawing(background=False)
+    display.close()
+    pipeline.close()
+    if startup.hands is not None:
+        startup.hands.close()
+    print("\nController stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import cv2
 import time
 from .config import *
+from .pipeline import HAND, FINGERS, SKELETON
 
 # ======================== MENU MODE ========================
+REQUIRES = {HAND, FINGERS, SKELETON}
 menu_hover_start = 0
 menu_hover_option = -1
 
@@ -0,0 +1,120 @@
+from collections import namedtuple
+import cv2
+from .utils import count_fingers
+from landmarks import Landmarks
+
+# Inputs a mode can declare in its REQUIRES set. A mode with an empty set only
+# gets the raw frame, and no MediaPipe graph runs for it.
+HAND = "hand"          # Hand landmarks (pixel tuples for cv2 drawing) and handedness
+FINGERS = "fingers"    # Extended-finger states and count
+SKELETON = "skeleton"  # MediaPipe hand skeleton drawn on the frame
+FACE = "face"          # Face mesh landmarks
+
+# Stages that imply others
+IMPLIES = {FINGERS: {HAND}, SKELETON: {HAND}}
+
+FrameInputs = namedtuple("FrameInputs", ["landmarks", "hand", "handedness", "fingers", "finger_count", "finger_pos", "faces"])
+EMPTY = FrameInputs(None, None, "Right", [0, 0, 0, 0, 0], 0, None, [])
+
+def resolve(requires):
+    stages = set(requires)
+    for stage in list(stages):
+        stages |= IMPLIES.get(stage, set())
+    return frozenset(stages)
+
+class FramePipeline:
+    """Runs only the analysis stages the active mode declared in REQUIRES.
+
+    `startup` provides the MediaPipe module and Hands graph once they are
+    loaded (see modules.main.Startup); until then hand stages are skipped.
+    The face mesh graph is built the first time a mode asks for FACE.
+    """
+
+    def __init__(self, startup):
+        self.startup = startup
+        self.face_mesh = None
+        self._styles = None
+
+    @property
+    def hands_ready(self):
+        return self.startup.hands_ready
+
+    def _skeleton_styles(self, mp):
+        # The default style dicts are rebuilt on every call, so fetch them once
+        if self._styles is None:
+            self._styles = (mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
+                            mp.solutions.drawing_styles.get_default_hand_connections_style())
+        return self._styles
+
+    def run(self, img, requires):
+        stages = resolve(requires)
+        if not stages:
+            return EMPTY
+
+        h, w = img.shape[:2]
+        mp = self.startup.mp
+        img_rgb = None
+        landmarks = hand = finger_pos = None
+        handedness = "Right"
+        fingers, finger_count = [0, 0, 0, 0, 0], 0
+        faces = []
+
+        if HAND in stages and self.hands_ready:
+            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            results = self.startup.hands.process(img_rgb)
+            if results.multi_hand_landmarks:
+                for hand_landmarks, handedness_info in zip(results.multi_hand_landmarks, results.multi_handedness):
+                    if SKELETON in stages:
+                        mp.solutions.drawing_utils.draw_landmarks(img, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS,
+                                                                  *self._skeleton_styles(mp))
+                    classification = handedness_info.classification[0]
+                    handedness = classification.label
+                    hand = Landmarks.from_mediapipe(hand_landmarks, w, h, handedness, classification.score)
+                    if FINGERS in stages:
+                        finger_count, fingers = count_fingers(hand, handedness)
+                    # Mode handlers draw with cv2, so they get integer (x, y) tuples
+                    landmarks = hand.pixels()
+                    finger_pos = landmarks[8]
+
+        if FACE in stages and mp is not None:
+            if self.face_mesh is None:
+                self.face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1)
+            if img_rgb is None:
+                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            results = self.face_mesh.process(img_rgb)
+            if results.multi_face_landmarks:
+                faces = [Landmarks.from_mediapipe(face, w, h) for face in results.multi_face_landmarks]
+
+        return FrameInputs(landmarks, hand, handedness, fingers, finger_count, finger_pos, faces)
+
+    def close(self):
+        if self.face_mesh is not None:
+            self.face_mesh.close()
+            self.face_mesh = None
+
+class ReplayPipeline:
+    """FramePipeline stand-in that serves the landmarks of a recorded trace.
+
+    `source` is the landmark_trace.ReplaySource the frames are read from;
+    run() returns what was recorded for the frame read last, in the same
+    FrameInputs shape, so the mode handlers run without a camera or
+    MediaPipe. The skeleton is not drawn.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.hands_ready = True
+
+    def run(self, img, requires):
+        stages = resolve(requires)
+        if not stages:
+            return EMPTY
+        landmarks, fingers, finger_count, handedness = self.source.mode_inputs()
+        hand = self.source.current.hand if landmarks else None
+        if FINGERS not in stages:
+            fingers, finger_count = [0, 0, 0, 0, 0], 0
+        faces = list(self.source.current.faces) if FACE in stages else []
+        return FrameInputs(landmarks, hand, handedness, fingers, finger_count, landmarks[8] if landmarks else None, faces)
+
+    def close(self):
+        pass
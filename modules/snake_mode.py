@@ -1,105 +1,168 @@
 import cv2
 import random
 import time
+from collections import deque
+import numpy as np
 from .config import *
-from .utils import get_distance
+from .pipeline import HAND, FINGERS, SKELETON
 
 # ======================== SNAKE GAME ========================
-snake_body = []
-snake_direction = (1, 0)  # Right
-food_pos = None
-snake_score = 0
-game_over = False
-snake_speed = 8  # Lower = faster
+REQUIRES = {HAND, FINGERS, SKELETON}
+CELL = 20            # Pixels per step
+BORDER = 50          # Playfield margin
+STEP_SECONDS = 8 / 30.0  # One move every 8 frames at 30 FPS, whatever the camera delivers
+MAX_CATCH_UP = 5     # Moves simulated at most per rendered frame after a stall
 
-def init_snake():
-    global snake_body, snake_direction, food_pos, snake_score, game_over
-    snake_body = [(wCam//2, hCam//2)]
-    for i in range(1, 5):
-        snake_body.append((wCam//2 - i*20, hCam//2))
-    snake_direction = (1, 0)
-    spawn_food()
-    snake_score = 0
-    game_over = False
+class SnakeGame:
+    """Snake on a cell grid, advanced by a fixed-timestep clock.
 
-def spawn_food():
-    global food_pos
-    food_pos = (random.randint(100, wCam - 100), random.randint(100, hCam - 100))
+    The body is a deque of (col, row) cells mirrored in a boolean occupancy
+    grid, so moving, growing and collision checks are constant time no
+    matter how long the snake is. update() runs as many fixed-length steps
+    as real time allows, so speed does not depend on the frame rate.
+    """
 
-def snake_game_mode(img, landmarks, fingers, finger_count, frame_count):
-    global snake_body, snake_direction, food_pos, snake_score, game_over
-    
-    if game_over:
+    def __init__(self, width, height, step=STEP_SECONDS, clock=time.perf_counter):
+        self.step = step
+        self.clock = clock
+        # Lattice through the screen center, as the snake always started there
+        cx, cy = width // 2, height // 2
+        self.x0 = cx - ((cx - BORDER) // CELL) * CELL
+        self.y0 = cy - ((cy - BORDER) // CELL) * CELL
+        self.cols = (width - BORDER - self.x0) // CELL + 1
+        self.rows = (height - BORDER - self.y0) // CELL + 1
+        self.start_cell = ((cx - self.x0) // CELL, (cy - self.y0) // CELL)
+        self.reset()
+
+    def reset(self):
+        c, r = self.start_cell
+        self.body = deque((c - i, r) for i in range(5))  # Head first
+        self.occupied = np.zeros((self.rows, self.cols), dtype=bool)
+        for col, row in self.body:
+            self.occupied[row, col] = True
+        self.direction = (1, 0)
+        self.moved_direction = (1, 0)  # Direction of the last move, guards against 180 turns
+        self.score = 0
+        self.game_over = False
+        self.food = None
+        self.spawn_food()
+        self.last_time = None
+        self.accumulator = 0.0
+
+    def pixel(self, cell):
+        return self.x0 + cell[0] * CELL, self.y0 + cell[1] * CELL
+
+    def spawn_food(self):
+        # A few random probes are enough unless the board is nearly full
+        for _ in range(8):
+            cell = (random.randrange(self.cols), random.randrange(self.rows))
+            if not self.occupied[cell[1], cell[0]]:
+                self.food = cell
+                return
+        free = np.flatnonzero(~self.occupied)
+        if len(free) == 0:
+            self.food = None
+            self.game_over = True  # Board full
+            return
+        row, col = divmod(int(random.choice(free)), self.cols)
+        self.food = (col, row)
+
+    def steer(self, target):
+        """Point the snake towards a pixel position."""
+        hx, hy = self.pixel(self.body[0])
+        dx, dy = target[0] - hx, target[1] - hy
+        if abs(dx) > abs(dy):
+            new_dir = (1, 0) if dx > 0 else (-1, 0)
+        else:
+            new_dir = (0, 1) if dy > 0 else (0, -1)
+        if new_dir != (-self.moved_direction[0], -self.moved_direction[1]):
+            self.direction = new_dir
+
+    def move(self):
+        col, row = self.body[0]
+        head = (col + self.direction[0], row + self.direction[1])
+        self.moved_direction = self.direction
+        if not (0 <= head[0] < self.cols and 0 <= head[1] < self.rows):
+            self.game_over = True
+            return
+        grow = head == self.food
+        if not grow:
+            # The tail moves away this step, so its cell is free to enter
+            tail = self.body.pop()
+            self.occupied[tail[1], tail[0]] = False
+        if self.occupied[head[1], head[0]]:
+            self.game_over = True
+            return
+        self.body.appendleft(head)
+        self.occupied[head[1], head[0]] = True
+        if grow:
+            self.score += 10
+            self.spawn_food()
+
+    def update(self):
+        """Advance the simulation to the current time; returns the number of moves made."""
+        now = self.clock()
+        if self.last_time is None or now - self.last_time > MAX_CATCH_UP * self.step:
+            # First frame, or back from the menu: resume instead of catching up
+            self.last_time = now
+            return 0
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        moves = 0
+        while self.accumulator >= self.step and not self.game_over:
+            self.accumulator -= self.step
+            self.move()
+            moves += 1
+        return moves
+
+game = SnakeGame(wCam, hCam)
+
+def init_snake():
+    global game
+    game = SnakeGame(wCam, hCam)
+
+def snake_game_mode(img, landmarks, fingers, finger_count, frame_count=None):
+    # frame_count is no longer used: the game keeps its own clock
+    if game.game_over:
         cv2.putText(img, "GAME OVER!", (wCam//2 - 150, hCam//2 - 50), 
                     cv2.FONT_HERSHEY_SIMPLEX, 2, NEON_RED, 4)
-        cv2.putText(img, f"Score: {snake_score}", (wCam//2 - 80, hCam//2 + 20), 
+        cv2.putText(img, f"Score: {game.score}", (wCam//2 - 80, hCam//2 + 20), 
                     cv2.FONT_HERSHEY_SIMPLEX, 1, WHITE, 2)
         cv2.putText(img, "Show 5 fingers to restart", (wCam//2 - 180, hCam//2 + 70), 
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, NEON_GREEN, 2)
         
         if finger_count == 5:
-            init_snake()
+            game.reset()
         return
     
-    # Control direction with hand position
+    # Control direction with hand position relative to the snake head
     index_tip = landmarks[8]
-    head = snake_body[0]
-    
-    # Calculate direction based on finger position relative to snake head
-    dx = index_tip[0] - head[0]
-    dy = index_tip[1] - head[1]
-    
-    if abs(dx) > abs(dy):
-        new_dir = (1, 0) if dx > 0 else (-1, 0)
-    else:
-        new_dir = (0, 1) if dy > 0 else (0, -1)
-    
-    # Prevent 180-degree turns
-    if (new_dir[0] != -snake_direction[0] or new_dir[1] != -snake_direction[1]):
-        snake_direction = new_dir
-    
-    # Move snake (slower based on snake_speed)
-    if frame_count % snake_speed == 0:
-        new_head = (head[0] + snake_direction[0] * 20, head[1] + snake_direction[1] * 20)
-        
-        # Check wall collision
-        if new_head[0] < 50 or new_head[0] > wCam - 50 or new_head[1] < 50 or new_head[1] > hCam - 50:
-            game_over = True
-            return
-        
-        # Check self collision
-        if new_head in snake_body[1:]:
-            game_over = True
-            return
-        
-        snake_body.insert(0, new_head)
-        
-        # Check food collision
-        if get_distance(new_head, food_pos) < 30:
-            snake_score += 10
-            spawn_food()
-        else:
-            snake_body.pop()
+    game.steer(index_tip)
+    game.update()
+    if game.game_over:
+        return
+    head = game.pixel(game.body[0])
     
     # Draw game border
-    cv2.rectangle(img, (50, 50), (wCam - 50, hCam - 50), NEON_CYAN, 3)
+    cv2.rectangle(img, (BORDER, BORDER), (wCam - BORDER, hCam - BORDER), NEON_CYAN, 3)
     
     # Draw food
+    food_pos = game.pixel(game.food)
     cv2.circle(img, food_pos, 15, NEON_RED, -1)
     cv2.circle(img, food_pos, 20, NEON_RED, 2)
     
     # Draw snake
-    for i, segment in enumerate(snake_body):
+    for i, cell in enumerate(game.body):
         color = NEON_GREEN if i == 0 else (0, 200, 0)
         size = 15 if i == 0 else 12
-        cv2.circle(img, segment, size, color, -1)
+        cv2.circle(img, game.pixel(cell), size, color, -1)
     
     # Draw pointer (finger position)
     cv2.circle(img, index_tip, 10, NEON_PINK, -1)
     cv2.line(img, head, index_tip, NEON_PINK, 2)
     
     # Score
-    cv2.putText(img, f"SNAKE GAME | Score: {snake_score}", (wCam//2 - 150, 35), 
+    cv2.putText(img, f"SNAKE GAME | Score: {game.score}", (wCam//2 - 150, 35), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, NEON_GREEN, 2)
     cv2.putText(img, "Point where you want the snake to go!", (wCam//2 - 200, hCam - 20), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, WHITE, 1)
@@ -0,0 +1,119 @@
+import json
+import numpy as np
+
+
+class Stroke:
+    """One continuous brush stroke: int32 (N, 2) points, a BGR color and a line width."""
+
+    __slots__ = ("points", "color", "width", "bbox")
+
+    def __init__(self, points, color, width):
+        self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        self.color = tuple(int(c) for c in color)
+        self.width = int(width)
+        pad = self.width // 2 + 2
+        (x1, y1), (x2, y2) = self.points.min(axis=0), self.points.max(axis=0)
+        self.bbox = (int(x1) - pad, int(y1) - pad, int(x2) + pad + 1, int(y2) + pad + 1)
+
+    def segments(self, region=None):
+        """Indices i of the segments points[i] -> points[i + 1] that can touch `region`."""
+        if region is None:
+            return range(len(self.points) - 1)
+        pad = self.width // 2 + 2
+        a, b = self.points[:-1], self.points[1:]
+        lo, hi = np.minimum(a, b) - pad, np.maximum(a, b) + pad + 1
+        hit = (lo[:, 0] < region[2]) & (hi[:, 0] > region[0]) & (lo[:, 1] < region[3]) & (hi[:, 1] > region[1])
+        return np.flatnonzero(hit).tolist()
+
+    def to_dict(self):
+        return {"color": list(self.color), "width": self.width, "points": self.points.ravel().tolist()}
+
+
+def _intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class StrokeLog:
+    """Append-only list of strokes kept next to the pixels they produced.
+
+    Strokes are rasterized into `canvas` as they are drawn. undo() erases the
+    undone stroke's bounding box and repaints only the segments of the
+    remaining strokes that cross it, so its cost follows that stroke's area.
+    redo() draws the stroke again. The log can re-render the whole drawing
+    and be exported as JSON.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.strokes = []
+        self.undone = []
+        self._points = []  # Stroke being drawn
+        self._style = None
+
+    def add_point(self, point, color, width):
+        """Extend the current stroke (starting one if needed) and draw the new segment."""
+        point = (int(point[0]), int(point[1]))
+        if self._points and self._style != (color, width):
+            self.end()
+        if self._points:
+            self.canvas.line(self._points[-1], point, color, width)
+        else:
+            self._style = (color, width)
+        self._points.append(point)
+
+    def end(self):
+        """Finish the current stroke. A single point never drew anything and is dropped."""
+        if len(self._points) > 1:
+            self.strokes.append(Stroke(self._points, *self._style))
+            self.undone.clear()
+        self._points = []
+
+    def _draw(self, stroke, region=None):
+        pts = stroke.points.tolist()
+        for i in stroke.segments(region):
+            self.canvas.line(pts[i], pts[i + 1], stroke.color, stroke.width, region)
+
+    def undo(self):
+        self.end()
+        if not self.strokes:
+            return False
+        stroke = self.strokes.pop()
+        self.undone.append(stroke)
+        region = stroke.bbox
+        self.canvas.clear_region(*region)
+        for other in self.strokes:
+            if _intersects(other.bbox, region):
+                self._draw(other, region)
+        return True
+
+    def redo(self):
+        self.end()
+        if not self.undone:
+            return False
+        stroke = self.undone.pop()
+        self.strokes.append(stroke)
+        self._draw(stroke)
+        return True
+
+    def clear(self):
+        self.strokes.clear()
+        self.undone.clear()
+        self._points = []
+        self.canvas.clear()
+
+    def rerender(self):
+        self.end()
+        self.canvas.clear()
+        for stroke in self.strokes:
+            self._draw(stroke)
+
+    def to_dict(self):
+        return {
+            "width": self.canvas.width,
+            "height": self.canvas.height,
+            "strokes": [s.to_dict() for s in self.strokes],
+        }
+
+    def export(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
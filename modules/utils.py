@@ -1,17 +1,17 @@
 import numpy as np
 import cv2
 
+FINGER_TIPS = [8, 12, 16, 20]
+FINGER_PIPS = [6, 10, 14, 18]
+
 def count_fingers(landmarks, handedness):
-    fingers = []
+    # Accepts a Landmarks object or any (21, >=2) sequence of [x, y, ...]
+    pts = np.asarray(landmarks)
     if handedness == "Right":
-        fingers.append(1 if landmarks[4][0] < landmarks[3][0] else 0)
+        thumb = pts[4, 0] < pts[3, 0]
     else:
-        fingers.append(1 if landmarks[4][0] > landmarks[3][0] else 0)
-    
-    tips = [8, 12, 16, 20]
-    pips = [6, 10, 14, 18]
-    for tip, pip in zip(tips, pips):
-        fingers.append(1 if landmarks[tip][1] < landmarks[pip][1] else 0)
+        thumb = pts[4, 0] > pts[3, 0]
+    fingers = [int(thumb)] + (pts[FINGER_TIPS, 1] < pts[FINGER_PIPS, 1]).astype(int).tolist()
     
     return sum(fingers), fingers
 
@@ -0,0 +1,209 @@
+import argparse
+import queue
+import threading
+import time
+from collections import namedtuple
+from video_capture import open_capture, parse_source
+
+# One analysed frame of one stream: hands is a HandResult, faces a FaceResult
+# (None without face tracking), seq the capture sequence number of the frame
+StreamResult = namedtuple("StreamResult", ["stream", "seq", "timestamp", "frame", "hands", "faces"])
+
+
+class _Stream:
+    __slots__ = ("name", "source", "cap", "state", "processed", "last_seq")
+
+    def __init__(self, name, source, cap):
+        self.name = name
+        self.source = source
+        self.cap = cap
+        self.state = None
+        self.processed = 0
+        self.last_seq = 0
+
+
+class MultiStreamRunner:
+    """Tracks several cameras or video sources concurrently on a pool of worker threads.
+
+    Every worker owns its own HandTracker (and FaceTracker when `face_kwargs`
+    is given) and the streams are spread over the workers, each stream pinned
+    to one of them. A stream therefore has at most one frame in flight and
+    its results come out in capture order. Live cameras are read through
+    LatestFrameCapture, so a stream slower than its camera skips to the
+    newest frame; video files are analysed frame by frame without dropping
+    any (as fast as possible, or at their frame rate with
+    capture_kwargs={"realtime": True}).
+
+    One worker per stream (the default) keeps MediaPipe's frame-to-frame
+    tracking. With fewer workers than streams a worker alternates between
+    its streams, so its graphs run in static image mode; ROI and smoothing
+    state are still kept per stream.
+
+    Results go to `on_result(result)` on the worker thread when given,
+    otherwise into a bounded queue read through get() or iteration.
+    """
+
+    def __init__(self, sources, workers=None, hand_kwargs=None, face_kwargs=None, on_result=None,
+                 capture_kwargs=None, max_results=64, start=True):
+        if not isinstance(sources, dict):
+            sources = {str(i): src for i, src in enumerate(sources)}
+        self.streams = {}
+        for name, src in sources.items():
+            # Anything with read_latest() is used as is, everything else is opened as a capture
+            cap = src if hasattr(src, "read_latest") else open_capture(src, **(capture_kwargs or {}))
+            self.streams[name] = _Stream(name, src, cap)
+        self.workers = max(1, min(workers or len(self.streams), len(self.streams)))
+        self.hand_kwargs = dict(hand_kwargs or {})
+        self.face_kwargs = face_kwargs
+        self.on_result = on_result
+        self.results = queue.Queue(max_results)
+        self.errors = []
+        self._running = False
+        self._threads = []
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+        if start:
+            self.start()
+
+    def start(self):
+        if self._threads:
+            return self
+        self._running = True
+        names = list(self.streams)
+        for w in range(self.workers):
+            owned = [self.streams[name] for name in names[w::self.workers]]
+            thread = threading.Thread(target=self._worker, args=(owned,), name=f"StreamWorker-{w}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _worker(self, streams):
+        from hand_tracking import HandTracker
+        from face_tracking import FaceTracker
+        shared = len(streams) > 1
+        hand_tracker = face_tracker = None
+        try:
+            hand_kwargs = dict(self.hand_kwargs, static_image_mode=True) if shared else self.hand_kwargs
+            hand_tracker = HandTracker(**hand_kwargs)
+            if self.face_kwargs is not None:
+                face_kwargs = dict(self.face_kwargs, static_image_mode=True) if shared else self.face_kwargs
+                face_tracker = FaceTracker(**face_kwargs)
+            for stream in streams:
+                stream.state = hand_tracker.new_state()
+
+            # Alone on a stream the worker waits for the camera; otherwise it polls its streams in turn
+            timeout = 0.0 if shared else 0.5
+            live = list(streams)
+            while self._running and live:
+                idle = True
+                for stream in list(live):
+                    frame, timestamp, seq = stream.cap.read_latest(timeout)
+                    if frame is None:
+                        if stream.cap.ended:
+                            live.remove(stream)
+                        continue
+                    idle = False
+                    hands = hand_tracker.process(frame, timestamp, stream.state)
+                    faces = face_tracker.process(frame, timestamp) if face_tracker is not None else None
+                    self._deliver(stream, StreamResult(stream.name, seq, timestamp, frame, hands, faces))
+                if idle and shared:
+                    time.sleep(0.002)
+        except Exception as e:
+            self.errors.append(e)
+            raise
+        finally:
+            if hand_tracker is not None:
+                hand_tracker.close()
+            if face_tracker is not None:
+                face_tracker.close()
+
+    def _deliver(self, stream, result):
+        stream.processed += 1
+        stream.last_seq = result.seq
+        with self._latest_lock:
+            self._latest[stream.name] = result
+        if self.on_result is not None:
+            self.on_result(result)
+            return
+        while self._running:
+            try:
+                self.results.put(result, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def latest(self, stream):
+        """Newest StreamResult of `stream`, or None before its first frame."""
+        with self._latest_lock:
+            return self._latest.get(stream)
+
+    def get(self, timeout=None):
+        """Next StreamResult from any stream (each stream in order). None on timeout."""
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self):
+        while self.running or not self.results.empty():
+            result = self.get(timeout=0.1)
+            if result is not None:
+                yield result
+
+    @property
+    def running(self):
+        return self._running and any(thread.is_alive() for thread in self._threads)
+
+    def stats(self):
+        """Frames analysed and frames the capture dropped, per stream."""
+        return {name: {"processed": s.processed, "dropped": getattr(s.cap, "dropped", 0), "last_seq": s.last_seq}
+                for name, s in self.streams.items()}
+
+    def close(self, timeout=2.0):
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        for stream in self.streams.values():
+            if stream.cap is not stream.source:
+                stream.cap.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track hands (and faces) on several cameras or video files at once")
+    parser.add_argument("sources", nargs="+", help="camera indices, video files or stream URLs")
+    parser.add_argument("--workers", type=int, help="worker threads (default: one per source)")
+    parser.add_argument("--faces", action="store_true", help="also run the face mesh")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between status lines")
+    args = parser.parse_args(argv)
+
+    runner = MultiStreamRunner([parse_source(s) for s in args.sources], args.workers,
+                               hand_kwargs=dict(max_num_hands=args.max_hands),
+                               face_kwargs={} if args.faces else None)
+    print(f"Tracking {len(runner.streams)} stream(s) on {runner.workers} worker(s). Ctrl+C to stop.")
+    last = {name: 0 for name in runner.streams}
+    t0 = time.perf_counter()
+    try:
+        for _ in runner:
+            now = time.perf_counter()
+            if now - t0 >= args.interval:
+                stats = runner.stats()
+                parts = []
+                for name, s in stats.items():
+                    result = runner.latest(name)
+                    hands = len(result.hands.hands) if result else 0
+                    parts.append(f"{name}: {(s['processed'] - last[name]) / (now - t0):.1f} FPS, {hands} hand(s), {s['dropped']} dropped")
+                    last[name] = s["processed"]
+                print(" | ".join(parts))
+                t0 = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.close()
+    if runner.errors:
+        print(f"Worker error: {runner.errors[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import multiprocessing as mp_proc
+import queue
+import traceback
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+# Result of one frame: hand is a Landmarks (float32 (21, 3) array plus handedness)
+# or None, faces is a list of Landmarks. seq is the frame sequence number.
+TrackingResult = namedtuple("TrackingResult", ["seq", "hand", "faces"])
+
+
+class SharedFrameRing:
+    """Fixed-size ring of frames living in a multiprocessing.shared_memory block.
+
+    Frames are copied in once by the producer; worker processes attach to the
+    same block by name and read the slot in place, so no frame is ever pickled.
+    """
+
+    def __init__(self, shape, slots=4, dtype=np.uint8, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        size = int(np.prod(self.shape)) * self.dtype.itemsize * slots
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, seq, frame):
+        slot = seq % self.slots
+        np.copyto(self.frames[slot], frame)
+        return slot
+
+    def view(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        # Drop our view before closing, otherwise the buffer is still exported
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _tracker_worker(kind, ring_name, shape, slots, tracker_kwargs, tasks, results):
+    ring = None
+    img = None
+    try:
+        ring = SharedFrameRing(shape, slots, name=ring_name)
+        if kind == "hand":
+            from hand_tracking import HandTracker
+            tracker = HandTracker(**tracker_kwargs)
+        else:
+            from face_tracking import FaceTracker
+            tracker = FaceTracker(**tracker_kwargs)
+        results.put(("ready", kind, None, None))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot = task
+            img = ring.view(slot)
+            if kind == "hand":
+                results.put(("hand", seq, tracker.process(img).hand(), None))
+            else:
+                results.put(("face", seq, list(tracker.process(img).faces), None))
+    except Exception:
+        results.put(("error", kind, traceback.format_exc(), None))
+    finally:
+        img = None
+        if ring is not None:
+            ring.close()
+
+
+class ParallelTrackers:
+    """Runs HandTracker and FaceTracker in their own processes on the same frame.
+
+    Both graphs work on a frame concurrently, so the per-frame latency is that
+    of the slower tracker rather than the sum of both. Workers are started
+    lazily on the first frame, once the frame shape is known.
+    """
+
+    def __init__(self, hand_kwargs=None, face_kwargs=None, slots=4, start_timeout=30.0):
+        self.hand_kwargs = hand_kwargs or {}
+        self.face_kwargs = face_kwargs if face_kwargs is not None else {}
+        self.slots = slots
+        self.start_timeout = start_timeout
+        self.kinds = ["hand"] + (["face"] if face_kwargs is not False else [])
+        self.ring = None
+        self.tasks = {}
+        self.workers = []
+        self.results = None
+        self.seq = 0
+        self._pending = {}
+
+    def _start(self, shape):
+        ctx = mp_proc.get_context("spawn")
+        self.ring = SharedFrameRing(shape, self.slots)
+        self.results = ctx.Queue()
+        for kind in self.kinds:
+            kwargs = self.hand_kwargs if kind == "hand" else self.face_kwargs
+            self.tasks[kind] = ctx.Queue()
+            proc = ctx.Process(target=_tracker_worker, name=f"{kind}-tracker", daemon=True,
+                               args=(kind, self.ring.name, shape, self.slots, kwargs, self.tasks[kind], self.results))
+            proc.start()
+            self.workers.append(proc)
+
+        ready = 0
+        while ready < len(self.kinds):
+            msg = self._get(self.start_timeout)
+            if msg[0] == "ready":
+                ready += 1
+
+    def _get(self, timeout):
+        try:
+            msg = self.results.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError("Tracker worker did not respond in time")
+        if msg[0] == "error":
+            raise RuntimeError(f"{msg[1]} tracker worker failed:\n{msg[2]}")
+        return msg
+
+    def submit(self, img):
+        """Hand a frame to every worker and return its sequence number.
+
+        At most `slots` frames may be in flight, otherwise a slot that a worker
+        is still reading gets overwritten.
+        """
+        if self.ring is None:
+            self._start(img.shape)
+        elif img.shape != self.ring.shape:
+            raise ValueError(f"Frame shape changed from {self.ring.shape} to {img.shape}")
+        self.seq += 1
+        slot = self.ring.write(self.seq, img)
+        for kind in self.kinds:
+            self.tasks[kind].put((self.seq, slot))
+        return self.seq
+
+    def collect(self, seq, timeout=5.0):
+        """Block until all workers have answered for `seq` and return its TrackingResult."""
+        parts = self._pending.setdefault(seq, {})
+        while len(parts) < len(self.kinds):
+            kind, msg_seq, payload, extra = self._get(timeout)
+            self._pending.setdefault(msg_seq, {})[kind] = (payload, extra)
+        del self._pending[seq]
+        hand = parts.get("hand", (None, None))[0]
+        faces = parts.get("face", ([], None))[0]
+        return TrackingResult(seq, hand, faces)
+
+    def process(self, img):
+        return self.collect(self.submit(img))
+
+    def close(self):
+        for q in self.tasks.values():
+            q.put(None)
+        for proc in self.workers:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self.workers = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
@@ -0,0 +1,99 @@
+import time
+
+EVERY_FRAME = None
+ON_DEMAND = "on_demand"
+
+
+class Stage:
+    def __init__(self, name, fn, rate_hz=EVERY_FRAME, on_demand=False, event=False, default=None):
+        self.name = name
+        self.fn = fn
+        self.interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.on_demand = on_demand
+        self.event = event  # Events (e.g. swipes) are not replayed between runs
+        self.default = default
+        self.result = default
+        self.timestamp = None
+        self.pending = None
+        self.runs = 0
+        self.skips = 0
+
+
+class StageScheduler:
+    """Runs each analysis stage at its own cadence and caches its last result.
+
+    A stage either runs every frame, at most `rate_hz` times per second, or
+    (`on_demand=True`) only when a consumer asks for its result via result().
+    Between runs the previous result is reused; age() tells consumers how old
+    it is. Executions are timed under the stage name when a `telemetry`
+    recorder is given.
+    """
+
+    def __init__(self, clock=time.perf_counter, telemetry=None):
+        self.clock = clock
+        self.telemetry = telemetry
+        self.stages = {}
+
+    def add(self, name, fn, rate_hz=EVERY_FRAME, on_demand=False, event=False, default=None):
+        if rate_hz == ON_DEMAND:
+            rate_hz, on_demand = EVERY_FRAME, True
+        self.stages[name] = Stage(name, fn, rate_hz, on_demand, event, default)
+        return self.stages[name]
+
+    def _due(self, stage, now):
+        return stage.timestamp is None or now - stage.timestamp >= stage.interval
+
+    def _execute(self, stage, args, kwargs, now):
+        if self.telemetry is not None:
+            with self.telemetry.stage(stage.name):
+                stage.result = stage.fn(*args, **kwargs)
+        else:
+            stage.result = stage.fn(*args, **kwargs)
+        stage.timestamp = now
+        stage.pending = None
+        stage.runs += 1
+        return stage.result
+
+    def run(self, name, *args, **kwargs):
+        """Offer the stage fresh input; runs it if it is due, else returns the cached result.
+
+        On-demand stages only remember the input here. The input must stay
+        unmodified until result() is called (or be a copy).
+        """
+        stage = self.stages[name]
+        now = self.clock()
+        if stage.on_demand:
+            stage.pending = (args, kwargs)
+            return self.cached(name)
+        if self._due(stage, now):
+            return self._execute(stage, args, kwargs, now)
+        stage.skips += 1
+        return stage.default if stage.event else stage.result
+
+    def result(self, name):
+        """Consume a stage's result, running an on-demand stage on its latest input if due."""
+        stage = self.stages[name]
+        now = self.clock()
+        if stage.on_demand and stage.pending is not None and self._due(stage, now):
+            args, kwargs = stage.pending
+            return self._execute(stage, args, kwargs, now)
+        return stage.result
+
+    def cached(self, name):
+        # Last result without triggering any work
+        return self.stages[name].result
+
+    def age(self, name):
+        stage = self.stages[name]
+        if stage.timestamp is None:
+            return float("inf")
+        return self.clock() - stage.timestamp
+
+    def ages(self):
+        return {name: self.age(name) for name in self.stages}
+
+    def reset(self, name=None):
+        for stage in ([self.stages[name]] if name else self.stages.values()):
+            stage.result = stage.default
+            stage.timestamp = None
+            stage.pending = None
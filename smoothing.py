@@ -0,0 +1,134 @@
+import math
+import numpy as np
+
+
+class MovingAverageFilter:
+    """Mean of the last `window` samples, kept as a ring buffer plus running sum."""
+
+    def __init__(self, window=5):
+        self.window = window
+        self.buffer = None
+        self.total = None
+        self.idx = 0
+        self.count = 0
+        self.updates = 0
+
+    def __call__(self, x, timestamp=None):
+        x = np.asarray(x, dtype=np.float64)
+        if self.buffer is None or self.buffer.shape[1:] != x.shape:
+            self.buffer = np.zeros((self.window,) + x.shape)
+            self.total = np.zeros(x.shape)
+            self.idx = self.count = 0
+        if self.count == self.window:
+            self.total -= self.buffer[self.idx]
+        else:
+            self.count += 1
+        self.buffer[self.idx] = x
+        self.total += x
+        self.idx = (self.idx + 1) % self.window
+
+        # Re-sum now and then so floating point drift in the running sum stays bounded
+        self.updates += 1
+        if self.updates % 1024 == 0:
+            self.total = self.buffer[:self.count].sum(axis=0)
+        return self.total / self.count
+
+
+class ExponentialFilter:
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.value = None
+
+    def __call__(self, x, timestamp=None):
+        x = np.asarray(x, dtype=np.float64)
+        if self.value is None or self.value.shape != x.shape:
+            self.value = x.copy()
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value.copy()
+
+
+class OneEuroFilter:
+    """Speed-adaptive low-pass filter (Casiez et al., CHI 2012).
+
+    The cutoff frequency rises with the filtered speed of the signal: at rest
+    it stays near `min_cutoff` (little jitter), during fast motion `beta`
+    raises it so the output lags less.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0, default_dt=1 / 30.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.default_dt = default_dt
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, timestamp=None):
+        x = np.asarray(x, dtype=np.float64)
+        if self.x_prev is None or self.x_prev.shape != x.shape:
+            self.x_prev = x.copy()
+            self.dx_prev = np.zeros_like(x)
+            self.t_prev = timestamp
+            return x.copy()
+
+        dt = self.default_dt
+        if timestamp is not None and self.t_prev is not None and timestamp > self.t_prev:
+            dt = timestamp - self.t_prev
+        self.t_prev = timestamp
+
+        dx = (x - self.x_prev) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx_prev = self.dx_prev + a_d * (dx - self.dx_prev)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx_prev)
+        a = self._alpha(cutoff, dt)
+        self.x_prev = self.x_prev + a * (x - self.x_prev)
+        return self.x_prev.copy()
+
+
+FILTERS = {
+    "moving_average": MovingAverageFilter,
+    "ema": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+}
+
+
+class LandmarkSmoother:
+    """Keeps an independent filter per tracked hand so hands never blend together.
+
+    Hands are keyed by handedness (or any tracking ID). A key that has not
+    been seen for `max_age` seconds is dropped, so a hand re-entering the
+    frame does not get averaged with where it left.
+    """
+
+    def __init__(self, method="moving_average", max_age=0.5, **filter_kwargs):
+        if method not in FILTERS:
+            raise ValueError(f"Unknown smoothing method {method!r}, expected one of {sorted(FILTERS)}")
+        self.method = method
+        self.filter_kwargs = filter_kwargs
+        self.max_age = max_age
+        self.filters = {}
+        self.last_seen = {}
+
+    def smooth(self, key, points, timestamp):
+        for stale in [k for k, t in self.last_seen.items() if timestamp - t > self.max_age]:
+            self.reset(stale)
+        if key not in self.filters:
+            self.filters[key] = FILTERS[self.method](**self.filter_kwargs)
+        self.last_seen[key] = timestamp
+        return self.filters[key](points, timestamp)
+
+    def reset(self, key=None):
+        if key is None:
+            self.filters.clear()
+            self.last_seen.clear()
+        else:
+            self.filters.pop(key, None)
+            self.last_seen.pop(key, None)
@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("telemetry", "name", "start")
+
+    def __init__(self, telemetry, name):
+        self.telemetry = telemetry
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.telemetry.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.record(self.name, self.telemetry.clock() - self.start)
+        return False
+
+
+class Telemetry:
+    """Per-stage latency recorder with rolling percentiles.
+
+        with telemetry.stage("hud"):
+            renderer.draw_hud(...)
+
+    Each stage keeps its last `window` durations in a preallocated ring
+    buffer; stats() turns them into count / mean / p50 / p95 / p99 / max in
+    milliseconds. Timer objects are reused, so a timed stage allocates
+    nothing. When disabled, stage() hands back a shared no-op context
+    manager and record() returns immediately.
+
+    `export_path` (.json or .csv) gets a snapshot of the stats every
+    `export_interval` seconds from end_frame().
+    """
+
+    def __init__(self, enabled=True, window=512, export_path=None, export_interval=10.0, clock=time.perf_counter):
+        self.enabled = enabled
+        self.window = window
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.clock = clock
+        self._buffers = {}  # name -> [ring buffer, next index, count]
+        self._timers = {}
+        self._frame_start = None
+        self._last_export = clock()
+        self._overlay_lines = []
+        self._overlay_time = 0.0
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self, name)
+        return timer
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        entry = self._buffers.get(name)
+        if entry is None:
+            entry = self._buffers[name] = [np.zeros(self.window), 0, 0]
+        buf, idx, count = entry
+        buf[idx] = seconds
+        entry[1] = (idx + 1) % self.window
+        entry[2] = min(count + 1, self.window)
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = self.clock()
+
+    def end_frame(self):
+        """Record the whole frame as the "frame" stage and export if it is time to."""
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self._frame_start is not None:
+            self.record("frame", now - self._frame_start)
+        if self.export_path and now - self._last_export >= self.export_interval:
+            self._last_export = now
+            self.export()
+
+    def reset(self):
+        self._buffers.clear()
+
+    def stats(self):
+        out = {}
+        for name, (buf, _, count) in self._buffers.items():
+            if count == 0:
+                continue
+            ms = buf[:count] * 1000.0
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            out[name] = {
+                "count": count,
+                "mean": float(ms.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(ms.max()),
+            }
+        return out
+
+    def export(self, path=None):
+        """Write the current stats as JSON or CSV (chosen by extension), replacing the file."""
+        path = path or self.export_path
+        stats = self.stats()
+        tmp = path + ".tmp"
+        if path.lower().endswith(".csv"):
+            with open(tmp, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                for name, s in stats.items():
+                    writer.writerow([name, s["count"]] + [f"{s[k]:.3f}" for k in ("mean", "p50", "p95", "p99", "max")])
+        else:
+            with open(tmp, "w") as f:
+                json.dump({"time": time.time(), "window": self.window, "stages": stats}, f, indent=2)
+        os.replace(tmp, path)
+
+    def draw(self, img, x=10, y=None, refresh=0.5):
+        """Draw a small p50 / p95 / max table; the numbers are recomputed every `refresh` seconds."""
+        if not self.enabled:
+            return img
+        now = self.clock()
+        if now - self._overlay_time >= refresh:
+            self._overlay_time = now
+            self._overlay_lines = [f"{'stage':<10}{'p50':>7}{'p95':>7}{'max':>7} ms"] + [
+                f"{name[:10]:<10}{s['p50']:7.1f}{s['p95']:7.1f}{s['max']:7.1f}" for name, s in self.stats().items()]
+        if y is None:
+            y = img.shape[0] - 20 * len(self._overlay_lines) - 30
+        font = cv2.FONT_HERSHEY_PLAIN
+        for i, line in enumerate(self._overlay_lines):
+            cv2.putText(img, line, (x, y + i * 20), font, 1.1, (0, 0, 0), 3)
+            cv2.putText(img, line, (x, y + i * 20), font, 1.1, (0, 255, 255), 1)
+        return img
@@ -0,0 +1,256 @@
+import queue
+import threading
+import time
+import cv2
+
+
+class LatestFrameCapture:
+    """Reads the camera on its own thread and only ever exposes the newest frame.
+
+    Drop-in replacement for cv2.VideoCapture in the frame loops: read() returns
+    (success, frame) but never hands out a frame that was superseded by a newer
+    one, so slow processing cannot build up a backlog of stale frames.
+    """
+
+    def __init__(self, src=0, api_preference=None, width=None, height=None, buffer_size=1, start=True):
+        if api_preference is None:
+            self.cap = cv2.VideoCapture(src)
+        else:
+            self.cap = cv2.VideoCapture(src, api_preference)
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Only a hint - many backends ignore it, which is why we drain on a thread
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0       # Sequence number of the newest captured frame
+        self._read_seq = 0  # Sequence number last handed to the consumer
+        self._ended = False
+        self._running = False
+        self._thread = None
+
+        self.captured = 0
+        self.dropped = 0  # Frames overwritten before anyone read them
+        self.frame_interval = 1 / 30.0  # Running estimate of the capture interval (s)
+
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._update, name="LatestFrameCapture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _update(self):
+        while self._running:
+            success, frame = self.cap.read()
+            now = time.perf_counter()
+            with self._cond:
+                if not success:
+                    self._ended = True
+                    self._cond.notify_all()
+                    return
+                if self._seq > self._read_seq:
+                    self.dropped += 1
+                if self._timestamp:
+                    self.frame_interval += 0.1 * ((now - self._timestamp) - self.frame_interval)
+                self._frame = frame
+                self._timestamp = now
+                self._seq += 1
+                self.captured += 1
+                self._cond.notify_all()
+
+    def read_latest(self, timeout=1.0):
+        """Return (frame, timestamp, seq) of the newest frame not yet returned.
+
+        Only waits when the consumer is faster than the camera, i.e. for at most
+        one capture interval. Returns (None, 0.0, seq) when the stream ended or
+        no new frame arrived within `timeout` seconds (None = wait until one
+        does or the stream ends).
+        """
+        with self._cond:
+            if self._seq <= self._read_seq and not self._ended:
+                self._cond.wait_for(lambda: self._seq > self._read_seq or self._ended, timeout)
+            if self._seq <= self._read_seq:
+                return None, 0.0, self._read_seq
+            self._read_seq = self._seq
+            return self._frame, self._timestamp, self._seq
+
+    def read(self):
+        # Blocks through camera stalls; False only once the stream has ended
+        frame, _, _ = self.read_latest(None)
+        return frame is not None, frame
+
+    @property
+    def ended(self):
+        # The source ran out (end of a video file) or the camera stopped delivering
+        with self._cond:
+            return self._ended
+
+    def frame_age(self):
+        # Seconds since the newest frame was captured
+        with self._cond:
+            return time.perf_counter() - self._timestamp if self._timestamp else 0.0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def release(self):
+        self._running = False
+        with self._cond:
+            # Wake up readers waiting for a frame that will never come
+            self._ended = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.cap.release()
+
+
+
+class VideoFileCapture:
+    """Reads a video file in order, every frame, on a decode-ahead thread.
+
+    Same interface as LatestFrameCapture, but nothing is dropped: the decoder
+    waits while `buffer_size` frames are queued. Timestamps follow the file's
+    own timeline (frame index / CAP_PROP_FPS, counted from the first read);
+    with realtime=True a frame is also not handed out before its timestamp,
+    so the video plays at its recorded speed. Pacing honors the read
+    timeout: a frame that is not due yet is kept for a later read, so
+    polling with timeout=0 never sleeps.
+    """
+
+    def __init__(self, path, realtime=False, buffer_size=8, fps=None, start=True):
+        self.cap = cv2.VideoCapture(path)
+        self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_interval = 1.0 / self.fps
+        self.realtime = realtime
+        self._frames = queue.Queue(buffer_size)
+        self._t0 = None
+        self._next = None  # Decoded frame waiting until it is due
+        self._seq = 0
+        self._ended = False
+        self._running = False
+        self._thread = None
+
+        self.captured = 0
+        self.dropped = 0  # Always 0, kept for LatestFrameCapture compatibility
+
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._update, name="VideoFileCapture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _update(self):
+        while self._running:
+            success, frame = self.cap.read()
+            if success:
+                self.captured += 1
+            # None marks the end of the file for the reader
+            item = frame if success else None
+            while self._running:
+                try:
+                    self._frames.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            if not success:
+                return
+
+    def read_latest(self, timeout=1.0):
+        """Return (frame, timestamp, seq) of the next frame of the file.
+
+        Returns (None, 0.0, seq) at the end of the file, or when within
+        `timeout` seconds (None = wait) the decoder did not deliver or, with
+        realtime=True, the next frame did not become due.
+        """
+        if self._ended:
+            return None, 0.0, self._seq
+        if self._next is None:
+            try:
+                frame = self._frames.get(timeout=timeout) if timeout != 0 else self._frames.get_nowait()
+            except queue.Empty:
+                return None, 0.0, self._seq
+            if frame is None:
+                self._ended = True
+                return None, 0.0, self._seq
+            self._next = frame
+        now = time.perf_counter()
+        if self._t0 is None:
+            self._t0 = now
+        timestamp = self._t0 + self._seq * self.frame_interval
+        if self.realtime and timestamp > now:
+            delay = timestamp - now
+            if timeout is not None and delay > timeout:
+                if timeout > 0:
+                    time.sleep(timeout)
+                return None, 0.0, self._seq
+            time.sleep(delay)
+        frame, self._next = self._next, None
+        self._seq += 1
+        return frame, timestamp, self._seq
+
+    def read(self):
+        frame, _, _ = self.read_latest(None)
+        return frame is not None, frame
+
+    @property
+    def ended(self):
+        return self._ended
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def release(self):
+        self._running = False
+        self._ended = True
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.cap.release()
+
+
+def is_live_source(src):
+    """Camera index, camera device or network stream, as opposed to a video file."""
+    src = str(src)
+    return src.isdigit() or "://" in src or src.startswith("/dev/")
+
+
+def open_capture(src, api_preference=None, width=None, height=None, realtime=False, **kwargs):
+    """LatestFrameCapture for live sources, VideoFileCapture (every frame, in order) for files.
+
+    `realtime` paces a file to its frame rate, like a camera would deliver it.
+    """
+    if is_live_source(src):
+        return LatestFrameCapture(src, api_preference, width, height, **kwargs)
+    return VideoFileCapture(src, realtime=realtime)
+
+
+def parse_source(value):
+    """Camera index ("0", "1") or a video file / stream URL, as given on the command line."""
+    return int(value) if str(value).isdigit() else value